@@ -0,0 +1,109 @@
+import functools
+import os
+
+import pygame
+
+from collision import CollisionModel
+
+# 资源全部在第一次使用时才加载：无头训练只会加载碰撞检测需要的图片，
+# 不会初始化字体和音频，也不会创建窗口
+
+
+@functools.lru_cache(maxsize=None)
+def _image(name):
+    """
+    加载 imgs 目录下的图片，并放大到原来的2倍（scale2x）
+    os.path.join 用于安全拼接路径，避免不同系统路径分隔符的问题
+    """
+    return pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', name)))
+
+
+def pipe_image():
+    """
+    下管道图片
+    """
+    return _image('pipe.png')
+
+
+@functools.lru_cache(maxsize=None)
+def pipe_top_image():
+    """
+    上管道图片：将管道图片垂直翻转一次，所有管道共享
+    """
+    return pygame.transform.flip(pipe_image(), False, True)
+
+
+def base_image():
+    """
+    地面图片
+    """
+    return _image('base.png')
+
+
+def background_image():
+    """
+    背景图片
+    """
+    return _image('bg.png')
+
+
+@functools.lru_cache(maxsize=None)
+def bird_images():
+    """
+    小鸟的3张动画帧图片，用于扇翅膀动画
+    """
+    return [_image('bird1.png'), _image('bird2.png'), _image('bird3.png')]
+
+
+@functools.lru_cache(maxsize=None)
+def stat_font():
+    """
+    显示分数用的字体："Comic Sans MS"，字号为50；第一次使用时才初始化字体模块并扫描系统字体
+    """
+    pygame.font.init()
+    return pygame.font.SysFont('comicsans', 50)
+
+
+@functools.lru_cache(maxsize=None)
+def collision_model():
+    """
+    碰撞几何：小鸟各动画帧和上下管道的掩模，每个进程只生成一次
+    """
+    return CollisionModel(bird_images(), pipe_image())
+
+
+_music_loaded = False
+
+
+def play_music(volume=0.5):
+    """
+    循环播放背景音乐；混音器初始化和 mp3 加载每个进程只做一次，之后只在音乐停止时重新播放
+    """
+    global _music_loaded
+    if not _music_loaded:
+        # 初始化 Pygame 的混音器模块并加载背景音乐文件
+        pygame.mixer.init()
+        pygame.mixer.music.load('Investigations.mp3')
+        _music_loaded = True
+    if not pygame.mixer.music.get_busy():
+        # 设置音量（0.0 到 1.0 之间），-1 表示无限循环播放
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(-1)
+
+
+class lazy_asset:
+    """
+    延迟加载的类属性：第一次访问时调用 loader，并用结果替换自身，之后的访问没有额外开销
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        value = self.loader()
+        setattr(self.owner, self.name, value)
+        return value
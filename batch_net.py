@@ -0,0 +1,550 @@
+from collections import OrderedDict
+
+import numpy as np
+from neat.graphs import feed_forward_layers, required_for_output
+
+
+# ---------------- 向量化激活函数（与 neat.activations 中的同名函数逐元素等价） ----------------
+
+def sigmoid_activation(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def tanh_activation(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+def sin_activation(z):
+    return np.sin(np.clip(5.0 * z, -60.0, 60.0))
+
+
+def gauss_activation(z):
+    z = np.clip(z, -3.4, 3.4)
+    return np.exp(-5.0 * z ** 2)
+
+
+def relu_activation(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def elu_activation(z):
+    return np.where(z > 0.0, z, np.exp(np.minimum(z, 0.0)) - 1)
+
+
+def lelu_activation(z):
+    return np.where(z > 0.0, z, 0.005 * z)
+
+
+def selu_activation(z):
+    lam = 1.0507009873554804934193349852946
+    alpha = 1.6732632423543772848170429916717
+    return np.where(z > 0.0, lam * z, lam * alpha * (np.exp(np.minimum(z, 0.0)) - 1))
+
+
+def softplus_activation(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 0.2 * np.log(1 + np.exp(z))
+
+
+def identity_activation(z):
+    return z
+
+
+def clamped_activation(z):
+    return np.clip(z, -1.0, 1.0)
+
+
+def inv_activation(z):
+    # 与 neat 一致：除零（或溢出）时输出 0
+    with np.errstate(divide='ignore', over='ignore'):
+        inv = 1.0 / z
+    return np.where(np.isfinite(inv), inv, 0.0)
+
+
+def log_activation(z):
+    return np.log(np.maximum(z, 1e-7))
+
+
+def exp_activation(z):
+    return np.exp(np.clip(z, -60.0, 60.0))
+
+
+def abs_activation(z):
+    return np.abs(z)
+
+
+def hat_activation(z):
+    return np.maximum(0.0, 1 - np.abs(z))
+
+
+def square_activation(z):
+    return z ** 2
+
+
+def cube_activation(z):
+    return z ** 3
+
+
+ACTIVATIONS = {
+    'sigmoid': sigmoid_activation,
+    'tanh': tanh_activation,
+    'sin': sin_activation,
+    'gauss': gauss_activation,
+    'relu': relu_activation,
+    'elu': elu_activation,
+    'lelu': lelu_activation,
+    'selu': selu_activation,
+    'softplus': softplus_activation,
+    'identity': identity_activation,
+    'clamped': clamped_activation,
+    'inv': inv_activation,
+    'log': log_activation,
+    'exp': exp_activation,
+    'abs': abs_activation,
+    'hat': hat_activation,
+    'square': square_activation,
+    'cube': cube_activation,
+}
+
+
+def _vectorize(function):
+    """
+    配置中自定义的激活函数没有向量化版本时，退化为逐元素调用原函数
+    """
+    return np.vectorize(function, otypes=[np.float64])
+
+
+class CompiledNetwork:
+    """
+    单个基因组编译后的紧凑表示：
+    - signature：拓扑签名（节点的求值顺序、激活/聚合函数、输入来源），拓扑相同的网络签名相同
+    - weights / biases / responses：按签名顺序连续存放的参数数组
+    """
+    __slots__ = ('signature', 'weights', 'biases', 'responses')
+
+    def __init__(self, signature, weights, biases, responses):
+        self.signature = signature
+        self.weights = weights
+        self.biases = biases
+        self.responses = responses
+
+    @staticmethod
+    def create(genome, config):
+        """
+        按 neat.nn.FeedForwardNetwork.create 的规则编译基因组
+        :param genome: NEAT 基因组
+        :param config: NEAT 配置对象
+        """
+        genome_config = config.genome_config
+        input_keys = genome_config.input_keys
+        output_keys = genome_config.output_keys
+
+        # 只保留启用的连接，并按层排序需要计算的节点
+        connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+        layers = feed_forward_layers(input_keys, output_keys, connections)
+        # 新版 neat-python 会同时返回 required 集合，这里统一只取分层结果
+        if isinstance(layers, tuple):
+            layers = layers[0]
+        required = set(required_for_output(input_keys, output_keys, connections)) | set(input_keys)
+
+        # 列号：输入节点占前 len(input_keys) 列，其余节点按求值顺序依次编号
+        columns = {key: i for i, key in enumerate(input_keys)}
+        signature_layers = []
+        weights = []
+        biases = []
+        responses = []
+        for layer in layers:
+            signature_nodes = []
+            for node in sorted(layer):
+                ng = genome.nodes[node]
+                links = sorted((columns[i], genome.connections[(i, o)].weight)
+                               for i, o in connections if o == node and i in required)
+                signature_nodes.append((ng.activation, ng.aggregation, tuple(c for c, _ in links)))
+                weights.extend(w for _, w in links)
+                biases.append(ng.bias)
+                responses.append(ng.response)
+            # 同一层的节点互不依赖，全部登记完再分配列号
+            for node in sorted(layer):
+                columns[node] = len(columns)
+            signature_layers.append(tuple(signature_nodes))
+
+        # 没有被任何层计算到的输出节点恒为 0（与 FeedForwardNetwork 的初始值一致）
+        outputs = tuple(columns.get(key, -1) for key in output_keys)
+        signature = (len(input_keys), tuple(signature_layers), outputs)
+        return CompiledNetwork(signature,
+                               np.array(weights, dtype=np.float64),
+                               np.array(biases, dtype=np.float64),
+                               np.array(responses, dtype=np.float64))
+
+
+def genome_key(genome, config):
+    """
+    基因组的结构和参数指纹：只包含影响编译结果的部分（节点参数和启用的连接），
+    指纹相同的两个基因组编译出的网络完全相同
+    """
+    nodes = tuple(sorted((key, ng.bias, ng.response, ng.activation, ng.aggregation)
+                         for key, ng in genome.nodes.items()))
+    connections = tuple(sorted((cg.key, cg.weight) for cg in genome.connections.values() if cg.enabled))
+    return len(config.genome_config.input_keys), nodes, connections
+
+
+class NetworkCache:
+    """
+    编译结果的 LRU 缓存：以 genome_key 为键保存 CompiledNetwork
+    精英个体和结构、参数都没有变化的后代在下一代直接复用编译结果，不再重新分层排序；
+    缓存最多保存 maxsize 个网络，超出时淘汰最久未使用的，内存占用有上界
+    """
+
+    def __init__(self, maxsize=50000):
+        """
+        :param maxsize: 最多缓存的网络数量，应不小于种群大小，否则同一代的网络会互相淘汰
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._nets = OrderedDict()
+
+    def __len__(self):
+        return len(self._nets)
+
+    def get(self, genome, config):
+        """
+        返回基因组编译后的 CompiledNetwork；缓存中没有时编译并加入缓存
+        """
+        key = genome_key(genome, config)
+        net = self._nets.get(key)
+        if net is not None:
+            self._nets.move_to_end(key)
+            self.hits += 1
+            return net
+        self.misses += 1
+        net = CompiledNetwork.create(genome, config)
+        self._nets[key] = net
+        if len(self._nets) > self.maxsize:
+            self._nets.popitem(last=False)
+        return net
+
+    def clear(self):
+        self._nets.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# 进程内共享的缓存：Population.run 每代调用一次评估函数，缓存需要跨代保留
+# （多进程评估时每个工作进程各有一份）
+NETWORK_CACHE = NetworkCache()
+
+
+class _Block:
+    """
+    一层中激活函数和聚合函数都相同的一组节点，整组一次批量计算
+    """
+    __slots__ = ('activation', 'aggregation', 'sources', 'columns', 'weights', 'mask',
+                 'biases', 'responses')
+
+    def __init__(self, activation, aggregation, sources, columns, weights, mask, biases, responses):
+        self.activation = activation    # 向量化激活函数
+        self.aggregation = aggregation  # 聚合函数名，或自定义的 Python 聚合函数
+        self.sources = sources          # 本组节点用到的输入列
+        self.columns = columns          # 本组节点自己的输出列
+        self.weights = weights          # (成员数, 输入列数, 节点数)，没有连接的位置为 0
+        self.mask = mask                # (输入列数, 节点数)，True 表示存在连接
+        self.biases = biases            # (成员数, 节点数)
+        self.responses = responses      # (成员数, 节点数)
+
+
+class _TopologyGroup:
+    """
+    拓扑完全相同的一组网络：参数按成员堆叠成矩阵，所有成员在同一次矩阵乘法中前向计算
+    """
+
+    def __init__(self, signature, nets, config):
+        num_inputs, layers, outputs = signature
+        self.size = len(nets)
+        self.num_inputs = num_inputs
+        self.outputs = outputs
+        self.num_columns = num_inputs + sum(len(layer) for layer in layers)
+        self.positions = np.arange(self.size)
+
+        weights = np.array([net.weights for net in nets]).reshape(self.size, -1)
+        biases = np.array([net.biases for net in nets]).reshape(self.size, -1)
+        responses = np.array([net.responses for net in nets]).reshape(self.size, -1)
+        activation_defs = config.genome_config.activation_defs
+        aggregation_defs = config.genome_config.aggregation_function_defs
+
+        self.blocks = []
+        node = 0
+        link = 0
+        for layer in layers:
+            # 同一层内按 (激活函数, 聚合函数) 分组
+            by_function = {}
+            for activation, aggregation, sources in layer:
+                by_function.setdefault((activation, aggregation), []).append((node, link, sources))
+                node += 1
+                link += len(sources)
+
+            for (activation, aggregation), nodes in by_function.items():
+                sources = sorted({s for _, _, node_sources in nodes for s in node_sources})
+                source_index = {s: i for i, s in enumerate(sources)}
+                block_weights = np.zeros((self.size, len(sources), len(nodes)))
+                mask = np.zeros((len(sources), len(nodes)), dtype=bool)
+                for j, (_, first_link, node_sources) in enumerate(nodes):
+                    for k, s in enumerate(node_sources):
+                        block_weights[:, source_index[s], j] = weights[:, first_link + k]
+                        mask[source_index[s], j] = True
+
+                node_index = [n for n, _, _ in nodes]
+                if activation in ACTIVATIONS:
+                    activation_function = ACTIVATIONS[activation]
+                else:
+                    activation_function = _vectorize(activation_defs.get(activation))
+                if aggregation not in ('sum', 'product', 'max', 'min', 'maxabs', 'median', 'mean'):
+                    aggregation = aggregation_defs.get(aggregation)
+
+                self.blocks.append(_Block(activation_function,
+                                          aggregation,
+                                          np.array(sources, dtype=np.int64),
+                                          np.array(node_index, dtype=np.int64) + num_inputs,
+                                          block_weights,
+                                          mask,
+                                          biases[:, node_index],
+                                          responses[:, node_index]))
+
+    def activate(self, inputs, positions=None):
+        """
+        批量前向计算
+        :param inputs: (n, 输入数) 的输入矩阵
+        :param positions: 每行输入对应的组内成员下标；None 表示全部成员按顺序参与
+        :return: (n, 输出数) 的输出矩阵
+        """
+        values = np.zeros((len(inputs), self.num_columns))
+        values[:, :self.num_inputs] = inputs
+
+        for block in self.blocks:
+            if positions is None:
+                weights, biases, responses = block.weights, block.biases, block.responses
+            else:
+                weights = block.weights[positions]
+                biases = block.biases[positions]
+                responses = block.responses[positions]
+            s = _aggregate(block.aggregation, values[:, block.sources], weights, block.mask)
+            values[:, block.columns] = block.activation(biases + responses * s)
+
+        outputs = np.zeros((len(inputs), len(self.outputs)))
+        for j, column in enumerate(self.outputs):
+            if column >= 0:
+                outputs[:, j] = values[:, column]
+        return outputs
+
+
+def _aggregate(aggregation, source_values, weights, mask):
+    """
+    计算一组节点的聚合值
+    :param aggregation: 聚合函数名或自定义函数
+    :param source_values: (n, 输入列数) 的输入值
+    :param weights: (n, 输入列数, 节点数) 的权重
+    :param mask: (输入列数, 节点数) 的连接掩码
+    :return: (n, 节点数) 的聚合结果
+    """
+    if aggregation == 'sum':
+        # 求和聚合就是一次批量矩阵乘法：(n, 1, S) @ (n, S, N)
+        return np.matmul(source_values[:, None, :], weights)[:, 0, :]
+
+    n, num_sources, num_nodes = weights.shape
+    if num_sources == 0:
+        # 没有输入连接的偏置神经元：乘积聚合为 1，其余为 0
+        return np.full((n, num_nodes), 1.0 if aggregation == 'product' else 0.0)
+
+    products = source_values[:, :, None] * weights
+    count = mask.sum(axis=0)
+    if aggregation == 'product':
+        return np.where(mask, products, 1.0).prod(axis=1)
+    if aggregation == 'max':
+        return np.where(mask, products, -np.inf).max(axis=1)
+    if aggregation == 'min':
+        return np.where(mask, products, np.inf).min(axis=1)
+    if aggregation == 'maxabs':
+        masked = np.where(mask, products, 0.0)
+        index = np.abs(masked).argmax(axis=1)
+        return np.take_along_axis(masked, index[:, None, :], axis=1)[:, 0, :]
+    if aggregation == 'mean':
+        return np.where(mask, products, 0.0).sum(axis=1) / np.maximum(count, 1)
+    if aggregation == 'median':
+        return np.nanmedian(np.where(mask, products, np.nan), axis=1)
+
+    # 自定义聚合函数：逐个网络、逐个节点调用
+    result = np.empty((n, num_nodes))
+    for i in range(n):
+        for j in range(num_nodes):
+            result[i, j] = aggregation(list(products[i, mask[:, j], j]))
+    return result
+
+
+class _PaddedGroup:
+    """
+    成员太少、不值得单独成组的网络合并成一个按层补零的稠密组
+    第 l 层的每个节点可以连接到它之前的所有列（不存在的连接权重为 0），
+    所以不同拓扑的网络也能在同一次矩阵乘法里计算；只适用于求和聚合的网络
+    """
+
+    def __init__(self, nets):
+        num_inputs = nets[0].signature[0]
+        self.size = len(nets)
+        self.num_inputs = num_inputs
+        self.positions = np.arange(self.size)
+
+        depth = max(len(net.signature[1]) for net in nets)
+        widths = [max((len(net.signature[1][l]) if l < len(net.signature[1]) else 0) for net in nets)
+                  for l in range(depth)]
+        offsets = [num_inputs]
+        for width in widths:
+            offsets.append(offsets[-1] + width)
+        # 最后一列恒为 0，没有被计算到的输出节点从这里取值
+        self.zero_column = offsets[-1]
+        self.num_columns = self.zero_column + 1
+
+        # 本组用到的激活函数，每个节点记录激活函数的编号
+        names = sorted({node[0] for net in nets for layer in net.signature[1] for node in layer})
+        self.activations = [ACTIVATIONS[name] for name in names]
+        activation_id = {name: i for i, name in enumerate(names)}
+
+        self.layers = []
+        for l, width in enumerate(widths):
+            self.layers.append((offsets[l], width,
+                                np.zeros((self.size, offsets[l], width)),
+                                np.zeros((self.size, width)),
+                                np.zeros((self.size, width)),
+                                np.zeros((self.size, width), dtype=np.int64)))
+
+        num_outputs = len(nets[0].signature[2])
+        self.outputs = np.full((self.size, num_outputs), self.zero_column, dtype=np.int64)
+        for i, net in enumerate(nets):
+            _, layers, outputs = net.signature
+            # 网络自己的列号 → 稠密组中的列号
+            dense = list(range(num_inputs))
+            node = 0
+            link = 0
+            for l, layer in enumerate(layers):
+                offset, _, weights, biases, responses, activation_ids = self.layers[l]
+                for j, (activation, _, sources) in enumerate(layer):
+                    for s in sources:
+                        weights[i, dense[s], j] = net.weights[link]
+                        link += 1
+                    biases[i, j] = net.biases[node]
+                    responses[i, j] = net.responses[node]
+                    activation_ids[i, j] = activation_id[activation]
+                    node += 1
+                dense.extend(offset + j for j in range(len(layer)))
+            for j, column in enumerate(outputs):
+                if column >= 0:
+                    self.outputs[i, j] = dense[column]
+
+    def activate(self, inputs, positions=None):
+        """
+        批量前向计算，参数和返回值与 _TopologyGroup.activate 相同
+        """
+        n = len(inputs)
+        values = np.zeros((n, self.num_columns))
+        values[:, :self.num_inputs] = inputs
+
+        for offset, width, weights, biases, responses, activation_ids in self.layers:
+            if positions is not None:
+                weights = weights[positions]
+                biases = biases[positions]
+                responses = responses[positions]
+                activation_ids = activation_ids[positions]
+            s = np.matmul(values[:, None, :offset], weights)[:, 0, :]
+            z = biases + responses * s
+            if len(self.activations) == 1:
+                values[:, offset:offset + width] = self.activations[0](z)
+            else:
+                result = np.zeros_like(z)
+                for i, activation in enumerate(self.activations):
+                    result = np.where(activation_ids == i, activation(z), result)
+                values[:, offset:offset + width] = result
+
+        outputs = self.outputs if positions is None else self.outputs[positions]
+        return values[np.arange(n)[:, None], outputs]
+
+
+def _paddable(signature):
+    """
+    只有全部节点都是求和聚合、且激活函数有向量化版本的网络才能放进补零组
+    """
+    return all(aggregation == 'sum' and activation in ACTIVATIONS
+               for layer in signature[1] for activation, aggregation, _ in layer)
+
+
+class BatchNetwork:
+    """
+    一代种群的批量神经网络：每代编译一次，之后每帧用一次调用计算所有存活小鸟的输出
+    拓扑相同的网络被分到同一组，共享同一次矩阵乘法；
+    成员少于 MIN_GROUP_SIZE 的拓扑合并进一个补零的稠密组，避免每帧为大量小组各做一次计算
+    """
+    MIN_GROUP_SIZE = 16
+
+    def __init__(self, nets, config):
+        """
+        :param nets: CompiledNetwork 列表，下标即小鸟编号
+        :param config: NEAT 配置对象
+        """
+        members = {}
+        for i, net in enumerate(nets):
+            members.setdefault(net.signature, []).append(i)
+
+        self.size = len(nets)
+        self.num_outputs = len(config.genome_config.output_keys)
+        self.groups = []
+        # 每个网络所在的组，以及它在组内的下标
+        self.group_of = np.zeros(self.size, dtype=np.int64)
+        self.position = np.zeros(self.size, dtype=np.int64)
+        padded = []
+        for signature, indices in members.items():
+            if len(indices) < self.MIN_GROUP_SIZE and _paddable(signature):
+                padded.extend(indices)
+                continue
+            self._add_group(indices, _TopologyGroup(signature, [nets[i] for i in indices], config))
+        if padded:
+            padded.sort()
+            self._add_group(padded, _PaddedGroup([nets[i] for i in padded]))
+
+    def _add_group(self, indices, group):
+        self.group_of[indices] = len(self.groups)
+        self.position[indices] = np.arange(len(indices))
+        self.groups.append(group)
+
+    @staticmethod
+    def create(genomes, config, cache=None):
+        """
+        :param genomes: 基因组列表（不带 ID）
+        :param config: NEAT 配置对象
+        :param cache: NetworkCache，复用之前编译过的网络；None 表示全部重新编译
+        """
+        if cache is None:
+            return BatchNetwork([CompiledNetwork.create(g, config) for g in genomes], config)
+        return BatchNetwork([cache.get(g, config) for g in genomes], config)
+
+    def activate(self, inputs, rows):
+        """
+        计算指定网络的输出
+        :param inputs: (n, 输入数) 的输入矩阵，第 k 行是第 rows[k] 个网络的输入
+        :param rows: 参与计算的网络编号（通常是存活小鸟的下标）
+        :return: (n, 输出数) 的输出矩阵
+        """
+        rows = np.asarray(rows)
+        outputs = np.empty((len(rows), self.num_outputs))
+        if len(rows) == 0:
+            return outputs
+
+        # 按组排序后切段，每组只调用一次
+        groups = self.group_of[rows]
+        order = np.argsort(groups, kind='stable')
+        bounds = np.flatnonzero(np.diff(groups[order])) + 1
+        for segment in np.split(order, bounds):
+            group = self.groups[groups[segment[0]]]
+            positions = self.position[rows[segment]]
+            if len(positions) == group.size and np.array_equal(positions, group.positions):
+                positions = None
+            outputs[segment] = group.activate(inputs[segment], positions)
+        return outputs
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# 没有显示器时使用 SDL 的虚拟显示驱动，draw_window 的基准也能在服务器上运行
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+import neat
+
+from assets import collision_model
+from batch_net import BatchNetwork, NetworkCache
+from env import BIRD_X, BIRD_Y, FlappyEnv
+from flappy_bird import WIN_HEIGHT, WIN_WIDTH, Base, Bird, Pipe, Renderer, draw_window
+from population import BirdPopulation
+from simulation import simulate
+
+
+def load_config(config_file):
+    """
+    加载 NEAT 配置
+    """
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                              neat.DefaultSpeciesSet, neat.DefaultStagnation, config_file)
+
+
+def make_genomes(config, size, mutations):
+    """
+    生成 size 个随机基因组，每个再随机变异若干次，使拓扑与真实训练中一样多样
+    不经过 Population，避免为大种群做一次物种划分
+    """
+    reporters = neat.reporting.ReporterSet()
+    stagnation = config.stagnation_type(config.stagnation_config, reporters)
+    reproduction = config.reproduction_type(config.reproduction_config, reporters, stagnation)
+    genomes = list(reproduction.create_new(config.genome_type, config.genome_config, size).values())
+    for g in genomes:
+        for _ in range(mutations):
+            g.mutate(config.genome_config)
+    return genomes
+
+
+def measure(name, function, population, frames, trace_memory=True):
+    """
+    计时执行 function()，再在 tracemalloc 下重复一次测量峰值内存
+    :param function: 执行一次基准的函数，返回实际模拟的帧数（None 表示就是 frames）
+    """
+    start = time.perf_counter()
+    simulated = function()
+    seconds = time.perf_counter() - start
+    if simulated is not None:
+        frames = simulated
+
+    peak = None
+    if trace_memory:
+        # 单独一次带内存跟踪的运行，避免 tracemalloc 的开销影响计时
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result = {
+        'name': name,
+        'population': population,
+        'frames': frames,
+        'seconds': seconds,
+        'frames_per_sec': frames / seconds if seconds else None,
+        'bird_frames_per_sec': population * frames / seconds if seconds else None,
+        'peak_memory_bytes': peak,
+    }
+    print('{name:<28} pop={population:<6} frames={frames:<6} {seconds:8.3f}s '
+          '{bird_frames_per_sec:14.0f} bird-frames/s'.format(**result), file=sys.stderr)
+    return result
+
+
+def bench_bird_move(size, frames):
+    birds = [Bird(BIRD_X, BIRD_Y) for _ in range(size)]
+
+    def run():
+        for frame in range(frames):
+            for bird in birds:
+                bird.move()
+                # 定期跳跃，让小鸟一直处在屏幕中
+                if frame % 8 == 0:
+                    bird.jump()
+    return run
+
+
+def bench_population_move(size, frames):
+    birds = BirdPopulation(size, BIRD_X, BIRD_Y)
+    everyone = np.ones(size, dtype=bool)
+
+    def run():
+        for frame in range(frames):
+            birds.move()
+            if frame % 8 == 0:
+                birds.jump(everyone)
+    return run
+
+
+def bench_env_step(size, frames, seed):
+    # 不依赖 neat-python：随机策略驱动 size 个环境，全部结束时重新开始
+    env = FlappyEnv(size)
+    seeds = [seed + i for i in range(size)]
+    actions = np.random.RandomState(seed).random_sample((frames, size)) < 0.1
+
+    def run():
+        env.reset(seeds)
+        for frame in range(frames):
+            if env.dones.all():
+                env.reset(seeds)
+            env.step(actions[frame])
+    return run
+
+
+def _collision_scene(size, frames, seed):
+    """
+    生成碰撞基准用的场景：小鸟分布在整个屏幕高度上，管道逐帧扫过小鸟所在的列
+    """
+    rng = random.Random(seed)
+    ys = np.array([rng.uniform(0, 700) for _ in range(size)])
+    pipes = []
+    for frame in range(frames):
+        pipe = Pipe(BIRD_X + 100 - (frame * Pipe.VEL) % 220, rng)
+        pipes.append(pipe)
+    return ys, pipes
+
+
+def bench_pipe_collide(size, frames, seed):
+    ys, pipes = _collision_scene(size, frames, seed)
+    birds = [Bird(BIRD_X, y) for y in ys]
+
+    def run():
+        for pipe in pipes:
+            for bird in birds:
+                pipe.collide(bird)
+    return run
+
+
+def bench_collide_many(size, frames, seed):
+    ys, pipes = _collision_scene(size, frames, seed)
+    bird_frames = np.zeros(size, dtype=np.int64)
+    collision = collision_model()
+
+    def run():
+        for pipe in pipes:
+            collision.collide_many(bird_frames, BIRD_X, ys, pipe.x, pipe.top, pipe.bottom)
+    return run
+
+
+def _network_inputs(size, seed):
+    rng = np.random.RandomState(seed)
+    inputs = np.column_stack((np.full(size, BIRD_X, dtype=np.float64),
+                              rng.uniform(0, 700, size),
+                              rng.uniform(0, 700, size)))
+    return inputs
+
+
+def bench_activate(genomes, config, frames, seed):
+    nets = [neat.nn.FeedForwardNetwork.create(g, config) for g in genomes]
+    inputs = [tuple(row) for row in _network_inputs(len(genomes), seed)]
+
+    def run():
+        for _ in range(frames):
+            for net, x in zip(nets, inputs):
+                net.activate(x)
+    return run
+
+
+def bench_batch_create(genomes, config):
+    def run():
+        BatchNetwork.create(genomes, config)
+        # 编译每代只做一次，按 1 帧计
+        return 1
+    return run
+
+
+def bench_batch_create_cached(genomes, config):
+    # 缓存中已有全部网络（相当于整代基因组都没有变化），只剩指纹计算和分组
+    cache = NetworkCache()
+    BatchNetwork.create(genomes, config, cache)
+
+    def run():
+        BatchNetwork.create(genomes, config, cache)
+        return 1
+    return run
+
+
+def bench_batch_activate(genomes, config, frames, seed):
+    net = BatchNetwork.create(genomes, config)
+    inputs = _network_inputs(len(genomes), seed)
+    rows = np.arange(len(genomes))
+
+    def run():
+        for _ in range(frames):
+            net.activate(inputs, rows)
+    return run
+
+
+def bench_draw_window(size, frames, seed):
+    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
+    rng = random.Random(seed)
+    birds = [Bird(BIRD_X, rng.uniform(0, 700)) for _ in range(size)]
+    pipes = [Pipe(600, rng), Pipe(300, rng)]
+    base = Base(730)
+
+    def run():
+        for frame in range(frames):
+            for bird in birds:
+                bird.move()
+                bird.animate()
+            for pipe in pipes:
+                pipe.move()
+            base.move()
+            draw_window(win, birds, pipes, base, frame)
+    return run
+
+
+def bench_renderer(size, frames, seed, max_birds=None):
+    renderer = Renderer(fps=None, music=False, max_birds=max_birds)
+    rng = random.Random(seed)
+    birds = [Bird(BIRD_X, rng.uniform(0, 700)) for _ in range(size)]
+    pipes = [Pipe(600, rng), Pipe(300, rng)]
+    base = Base(730)
+
+    def run():
+        for frame in range(frames):
+            for bird in birds:
+                bird.move()
+                bird.animate()
+            for pipe in pipes:
+                pipe.move()
+            base.move()
+            renderer.draw(birds, pipes, base, frame)
+    return run
+
+
+def bench_generation(genomes, config, game_length, seed):
+    def run():
+        net = BatchNetwork.create(genomes, config)
+
+        def decide(frame, inputs, rows):
+            return net.activate(inputs, rows)[:, 0] > 0.5
+
+        _, _, frames = simulate(decide, len(genomes), seed, max_frames=game_length)
+        return frames
+    return run
+
+
+def run_benchmarks(config_file, populations, frames, game_lengths, mutations=3, seed=0,
+                   include_slow=True, trace_memory=True):
+    """
+    运行全部基准，返回可直接序列化为 JSON 的结果
+    :param populations: 种群规模列表
+    :param frames: 微基准每项模拟的帧数
+    :param game_lengths: 整代模拟的最大帧数列表
+    :param include_slow: 是否包含逐对象的基准（Bird.move / Pipe.collide / activate / draw_window）
+    """
+    config = load_config(config_file)
+    random.seed(seed)
+    results = []
+    for size in populations:
+        genomes = make_genomes(config, size, mutations)
+        if include_slow:
+            results.append(measure('Bird.move', bench_bird_move(size, frames), size, frames, trace_memory))
+        results.append(measure('BirdPopulation.move', bench_population_move(size, frames), size, frames,
+                               trace_memory))
+        results.append(measure('FlappyEnv.step', bench_env_step(size, frames, seed), size, frames, trace_memory))
+        if include_slow:
+            results.append(measure('Pipe.collide', bench_pipe_collide(size, frames, seed), size, frames,
+                                   trace_memory))
+        results.append(measure('CollisionModel.collide_many', bench_collide_many(size, frames, seed), size,
+                               frames, trace_memory))
+        if include_slow:
+            results.append(measure('FeedForwardNetwork.activate', bench_activate(genomes, config, frames, seed),
+                                   size, frames, trace_memory))
+        results.append(measure('BatchNetwork.create', bench_batch_create(genomes, config), size, 1,
+                               trace_memory))
+        results.append(measure('BatchNetwork.create[cached]', bench_batch_create_cached(genomes, config), size, 1,
+                               trace_memory))
+        results.append(measure('BatchNetwork.activate', bench_batch_activate(genomes, config, frames, seed),
+                               size, frames, trace_memory))
+        if include_slow:
+            results.append(measure('draw_window', bench_draw_window(size, frames, seed), size, frames,
+                                   trace_memory))
+        results.append(measure('Renderer.draw', bench_renderer(size, frames, seed), size, frames, trace_memory))
+        results.append(measure('Renderer.draw[max_birds=50]', bench_renderer(size, frames, seed, 50), size,
+                               frames, trace_memory))
+        for game_length in game_lengths:
+            results.append(measure('generation[{}]'.format(game_length),
+                                   bench_generation(genomes, config, game_length, seed),
+                                   size, game_length, trace_memory))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pygame': pygame.version.ver,
+            'config': os.path.basename(config_file),
+            'seed': seed,
+            'mutations': mutations,
+        },
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Flappy Bird 模拟、推理和渲染热点的基准测试')
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), 'config_feedforward.txt'),
+                        help='NEAT 配置文件')
+    parser.add_argument('--populations', type=int, nargs='+', default=[100, 1000, 10000], help='种群规模')
+    parser.add_argument('--frames', type=int, default=30, help='微基准每项模拟的帧数')
+    parser.add_argument('--game-lengths', type=int, nargs='+', default=[300, 3000], help='整代模拟的最大帧数')
+    parser.add_argument('--mutations', type=int, default=3, help='每个随机基因组的变异次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--skip-slow', action='store_true', help='跳过逐对象的慢速基准')
+    parser.add_argument('--no-memory', action='store_true', help='不测量峰值内存')
+    parser.add_argument('--output', default=None, help='JSON 结果输出路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.config, args.populations, args.frames, args.game_lengths,
+                            mutations=args.mutations, seed=args.seed,
+                            include_slow=not args.skip_slow, trace_memory=not args.no_memory)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,205 @@
+import copy
+import glob
+import gzip
+import itertools
+import os
+import pickle
+import random
+import re
+import tempfile
+import time
+
+import neat
+from neat.reporting import BaseReporter
+
+from batch_net import BatchNetwork, CompiledNetwork
+
+# 检查点格式版本，字段变化时递增
+VERSION = 1
+# 检查点文件名：checkpoint-<下一代的代数>.pkl.gz
+_FILENAME = 'checkpoint-{:05d}.pkl.gz'
+_PATTERN = re.compile(r'checkpoint-(\d+)\.pkl\.gz$')
+
+
+def _atomic_dump(data, path):
+    """
+    先把 gzip 压缩的 pickle 写入同目录下的临时文件并刷到磁盘，再用 os.replace 原子地替换目标文件
+    进程在写入途中被杀死时，目标路径上要么是旧文件，要么是完整的新文件
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pkl.gz')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=5) as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _load(path):
+    with gzip.open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def list_checkpoints(directory):
+    """
+    按代数从小到大返回目录中的所有检查点路径
+    """
+    found = []
+    for path in glob.glob(os.path.join(directory, 'checkpoint-*.pkl.gz')):
+        match = _PATTERN.search(os.path.basename(path))
+        if match:
+            found.append((int(match.group(1)), path))
+    return [path for _, path in sorted(found)]
+
+
+def latest_checkpoint(directory):
+    """
+    返回目录中最新的检查点路径，没有时返回 None
+    """
+    checkpoints = list_checkpoints(directory)
+    return checkpoints[-1] if checkpoints else None
+
+
+class Checkpointer(BaseReporter):
+    """
+    周期性保存进化状态的报告器：种群、物种、停滞记录（保存在物种对象中）、繁殖器的祖先记录和创新号、
+    全局随机数状态、评估器的种子生成器状态以及统计数据
+    每代结束（下一代已经繁殖并划分好物种）时按代数或时间间隔保存，
+    恢复后继续运行与从未中断的运行完全相同
+    """
+
+    def __init__(self, population, directory, generation_interval=1, time_interval_seconds=None, keep=3,
+                 stats=None, evaluator=None):
+        """
+        :param population: 要保存的 neat.Population
+        :param directory: 检查点目录（不存在时自动创建）
+        :param generation_interval: 每隔多少代保存一次，None 表示不按代数保存
+        :param time_interval_seconds: 距离上次保存超过多少秒就保存，None 表示不按时间保存
+        :param keep: 最多保留的检查点数量，更早的会被删除；None 表示全部保留
+        :param stats: 一并保存的 neat.StatisticsReporter
+        :param evaluator: 一并保存种子生成器状态的 ParallelEvaluator
+        """
+        self.population = population
+        self.directory = directory
+        self.generation_interval = generation_interval
+        self.time_interval_seconds = time_interval_seconds
+        self.keep = keep
+        self.stats = stats
+        self.evaluator = evaluator
+        self.last_generation = population.generation
+        self.last_time = time.time()
+        os.makedirs(directory, exist_ok=True)
+
+    def end_generation(self, config, population, species_set):
+        # end_generation 之后 Population 才递增代数，这里保存的是下一代评估之前的状态
+        generation = self.population.generation + 1
+        due = (self.generation_interval is not None
+               and generation - self.last_generation >= self.generation_interval)
+        if self.time_interval_seconds is not None and time.time() - self.last_time >= self.time_interval_seconds:
+            due = True
+        if due:
+            self.save(generation)
+
+    def save(self, generation):
+        """
+        保存检查点，返回文件路径
+        :param generation: 恢复后要评估的第一代
+        """
+        p = self.population
+        reproduction = p.reproduction
+        # 物种集合引用着所有报告器（包括本对象和评估器的进程池），保存时去掉，恢复时由 Population 重新挂上
+        species = copy.copy(p.species)
+        species.reporters = None
+        # 新节点编号的计数器；neat 的 DefaultGenomeConfig 在 pickle 时会消耗它的一个值，
+        # 所以先取出下一个编号单独保存，写完后再恢复计数器，保证保存检查点不影响进化结果
+        genome_config = p.config.genome_config
+        next_node_key = None
+        if genome_config.node_indexer is not None:
+            next_node_key = next(genome_config.node_indexer)
+        data = {
+            'version': VERSION,
+            'generation': generation,
+            'config': p.config,
+            'population': p.population,
+            'species': species,
+            'best_genome': p.best_genome,
+            'ancestors': reproduction.ancestors,
+            'innovation_tracker': reproduction.innovation_tracker,
+            'next_node_key': next_node_key,
+            'random_state': random.getstate(),
+            'evaluator_state': self.evaluator.rng.getstate() if self.evaluator is not None else None,
+            'stats': self.stats,
+        }
+        path = os.path.join(self.directory, _FILENAME.format(generation))
+        try:
+            _atomic_dump(data, path)
+        finally:
+            if next_node_key is not None:
+                genome_config.node_indexer = itertools.count(next_node_key)
+        self.last_generation = generation
+        self.last_time = time.time()
+
+        if self.keep is not None:
+            for old in list_checkpoints(self.directory)[:-self.keep]:
+                os.remove(old)
+        return path
+
+
+def restore(path, config=None, evaluator=None):
+    """
+    从检查点恢复进化
+    :param path: 检查点路径
+    :param config: 新的 NEAT 配置对象，None 表示使用检查点中保存的配置
+    :param evaluator: 若提供 ParallelEvaluator，恢复它的种子生成器状态
+    :return: (neat.Population, neat.StatisticsReporter 或 None)；报告器需要重新添加
+    """
+    data = _load(path)
+    if data.get('version') != VERSION:
+        raise ValueError('不支持的检查点格式版本: {}'.format(data.get('version')))
+    if config is None:
+        config = data['config']
+
+    p = neat.Population(config, (data['population'], data['species'], data['generation']))
+    reproduction = p.reproduction
+    # 基因组编号由 Population 根据种群中最大的编号接着分配，与未中断时一致
+    reproduction.ancestors = data['ancestors']
+    # 创新号跟踪器同时挂在繁殖器和基因组配置上，二者必须是同一个对象
+    reproduction.innovation_tracker = data['innovation_tracker']
+    config.genome_config.innovation_tracker = data['innovation_tracker']
+    if data['next_node_key'] is not None:
+        config.genome_config.node_indexer = itertools.count(data['next_node_key'])
+    p.best_genome = data['best_genome']
+
+    random.setstate(data['random_state'])
+    if evaluator is not None and data['evaluator_state'] is not None:
+        evaluator.rng.setstate(data['evaluator_state'])
+    return p, data['stats']
+
+
+def export_winner(genome, config, path):
+    """
+    导出最优基因组及其预编译的网络参数，之后无需重新进化即可直接加载使用
+    """
+    _atomic_dump({
+        'version': VERSION,
+        'genome': genome,
+        'config': config,
+        'network': CompiledNetwork.create(genome, config),
+    }, path)
+
+
+def load_winner(path):
+    """
+    加载 export_winner 导出的文件
+    :return: (基因组, NEAT 配置对象, 只含这一个网络的 BatchNetwork)
+    """
+    data = _load(path)
+    if data.get('version') != VERSION:
+        raise ValueError('不支持的导出格式版本: {}'.format(data.get('version')))
+    return data['genome'], data['config'], BatchNetwork([data['network']], data['config'])
@@ -0,0 +1,117 @@
+import numpy as np
+import pygame
+
+# 管道朝向：上管道 / 下管道
+TOP = 0
+BOTTOM = 1
+
+
+def _opaque_box(mask):
+    """
+    返回掩模中所有不透明像素的外接矩形 (left, top, right, bottom)，右/下边界不包含
+    """
+    rects = mask.get_bounding_rects()
+    if not rects:
+        return 0, 0, 0, 0
+    box = rects[0].unionall(rects[1:])
+    return box.left, box.top, box.right, box.bottom
+
+
+class CollisionModel:
+    """
+    预计算的碰撞几何：掩模只在创建时生成一次（每个小鸟动画帧一个，每个管道朝向一个）
+    检测时先用不透明像素的外接矩形快速排除，只有矩形相交（即小鸟靠近管道边缘）时
+    才做像素级的掩模重叠检测，结果与 Pipe.collide 原来的逐帧生成掩模完全一致
+    """
+
+    def __init__(self, bird_imgs, pipe_img):
+        """
+        :param bird_imgs: 小鸟的动画帧图片列表
+        :param pipe_img: 下管道图片（上管道由它垂直翻转得到）
+        """
+        pipe_top = pygame.transform.flip(pipe_img, False, True)
+        self.bird_masks = [pygame.mask.from_surface(img) for img in bird_imgs]
+        self.pipe_masks = (pygame.mask.from_surface(pipe_top), pygame.mask.from_surface(pipe_img))
+
+        # 不透明像素的外接矩形，形状为 (数量, 4)：left, top, right, bottom
+        self.bird_boxes = np.array([_opaque_box(m) for m in self.bird_masks], dtype=np.int64)
+        self.pipe_boxes = np.array([_opaque_box(m) for m in self.pipe_masks], dtype=np.int64)
+
+        # 小鸟所在的列：管道 x 坐标落在 (bird_x + _column[0], bird_x + _column[1]) 之外时，
+        # 不论小鸟的高度和动画帧如何，外接矩形在水平方向上都不相交
+        self._column = (int(self.bird_boxes[:, 0].min() - self.pipe_boxes[:, 2].max()),
+                        int(self.bird_boxes[:, 2].max() - self.pipe_boxes[:, 0].min()))
+
+        # 像素级检测结果缓存：(动画帧, 管道朝向, dx, dy) → 是否重叠
+        # 管道每帧移动 5 像素、小鸟 y 取整，偏移量的取值有限，缓存大小有上界
+        self._overlaps = {}
+
+    def column(self, bird_x):
+        """
+        返回开区间 (lo, hi)：管道 x 坐标在区间之外时不可能与 x 坐标为 bird_x 的小鸟碰撞
+        """
+        return bird_x + self._column[0], bird_x + self._column[1]
+
+    def in_column(self, bird_x, pipe_x):
+        """
+        管道是否进入了小鸟所在的列（只有此时才需要做碰撞检测）
+        """
+        lo, hi = self.column(bird_x)
+        return lo < pipe_x < hi
+
+    def overlap(self, frame, orientation, dx, dy):
+        """
+        像素级检测：小鸟第 frame 帧的掩模与指定朝向的管道掩模在偏移 (dx, dy) 下是否重叠
+        """
+        key = (frame, orientation, dx, dy)
+        hit = self._overlaps.get(key)
+        if hit is None:
+            hit = self.bird_masks[frame].overlap(self.pipe_masks[orientation], (dx, dy)) is not None
+            self._overlaps[key] = hit
+        return hit
+
+    def collide(self, frame, bird_x, bird_y, pipe_x, pipe_top, pipe_bottom):
+        """
+        检测一只小鸟是否与一对管道碰撞（与 Pipe.collide 的结果相同）
+        :param frame: 小鸟当前动画帧下标
+        :param bird_x: 小鸟 x 坐标
+        :param bird_y: 小鸟 y 坐标（与原逻辑一样取整后参与计算）
+        :param pipe_x: 管道 x 坐标
+        :param pipe_top: 上管道的 y 坐标
+        :param pipe_bottom: 下管道的 y 坐标
+        """
+        y = int(round(bird_y))
+        left, top, right, bottom = self.bird_boxes[frame]
+        for orientation, pipe_y in ((TOP, pipe_top), (BOTTOM, pipe_bottom)):
+            p_left, p_top, p_right, p_bottom = self.pipe_boxes[orientation]
+            # 外接矩形不相交 → 不可能碰撞
+            if (bird_x + right <= pipe_x + p_left or pipe_x + p_right <= bird_x + left
+                    or y + bottom <= pipe_y + p_top or pipe_y + p_bottom <= y + top):
+                continue
+            if self.overlap(frame, orientation, pipe_x - bird_x, pipe_y - y):
+                return True
+        return False
+
+    def collide_many(self, frames, bird_x, bird_y, pipe_x, pipe_top, pipe_bottom):
+        """
+        批量检测：一次判断多只小鸟是否与同一对管道碰撞
+        :param frames: 每只小鸟的动画帧下标数组
+        :param bird_x: 所有小鸟共同的 x 坐标
+        :param bird_y: 每只小鸟的 y 坐标数组
+        :param pipe_top / pipe_bottom: 上下管道的 y 坐标；可以是标量，也可以是每只小鸟各自的数组（多车道赛道）
+        :return: 布尔数组，True 表示碰撞
+        """
+        y = np.rint(bird_y).astype(np.int64)
+        boxes = self.bird_boxes[frames]
+        hit = np.zeros(len(frames), dtype=bool)
+
+        for orientation, pipe_y in ((TOP, pipe_top), (BOTTOM, pipe_bottom)):
+            p_left, p_top, p_right, p_bottom = self.pipe_boxes[orientation]
+            # 外接矩形批量排除；大多数帧管道根本不在小鸟所在的列上
+            near = ((bird_x + boxes[:, 0] < pipe_x + p_right) & (pipe_x + p_left < bird_x + boxes[:, 2])
+                    & (y + boxes[:, 1] < pipe_y + p_bottom) & (pipe_y + p_top < y + boxes[:, 3]) & ~hit)
+            # 只对外接矩形相交的小鸟做像素级检测
+            dy = pipe_y - y
+            for i in np.flatnonzero(near):
+                hit[i] = self.overlap(int(frames[i]), orientation, pipe_x - bird_x, int(dy[i]))
+        return hit
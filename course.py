@@ -0,0 +1,135 @@
+import random
+
+import numpy as np
+
+import assets
+from assets import lazy_asset
+from flappy_bird import Pipe
+
+
+class PipeCourse:
+    """
+    预分配的环形管道赛道
+    屏幕上同时存在的管道不超过 CAPACITY 根，每根管道是环形数组中的一条
+    (x, height, top, bottom, passed) 记录；管道高度由种子预先成批生成，
+    新管道只是复用一个空槽位，不再创建/丢弃对象，长时间运行内存保持不变
+    同一种子生成的赛道完全相同，同一代所有基因组读取的是同一条赛道
+
+    传入多个种子时赛道分成多条"车道"（lane）：管道的生成时机和 x 坐标所有车道共用，
+    每条车道的管道高度来自各自的种子，与单独用该种子生成的赛道完全相同；
+    height / top / bottom 的形状为 (CAPACITY, 车道数)
+    """
+    GAP = Pipe.GAP                          # 上下管道之间的间隙
+    VEL = Pipe.VEL                          # 管道每帧向左移动的距离
+    WIDTH = lazy_asset(lambda: assets.pipe_image().get_width())          # 管道宽度
+    PIPE_HEIGHT = lazy_asset(lambda: assets.pipe_image().get_height())   # 管道图片高度
+    CAPACITY = 4                            # 环形数组的槽位数
+
+    def __init__(self, seed=None, block=256):
+        """
+        :param seed: 赛道随机种子，或每条车道一个种子的序列；None 表示从全局 random 模块取一个种子
+        :param block: 每批预先生成的管道高度数量（所有车道合计）
+        """
+        seeds = list(seed) if isinstance(seed, (list, tuple, np.ndarray)) else [seed]
+        self.seeds = [random.getrandbits(32) if s is None else int(s) for s in seeds]
+        self.seed = self.seeds[0]
+        self.lanes = len(self.seeds)
+        self._rngs = [random.Random(s) for s in self.seeds]
+        # 车道很多时每条车道少生成一些，每批生成的高度总数保持在 block 左右
+        self._block = max(1, block // self.lanes)
+
+        # 预生成的管道高度缓冲区（每条车道一行），用完后从同一个随机数流继续生成下一批
+        self._heights = np.empty((self.lanes, self._block), dtype=np.int64)
+        self._cursor = self._block
+
+        # 环形数组：每个槽位存一根管道的状态
+        self.x = np.zeros(self.CAPACITY, dtype=np.int64)
+        self.height = np.zeros((self.CAPACITY, self.lanes), dtype=np.int64)
+        self.top = np.zeros((self.CAPACITY, self.lanes), dtype=np.int64)
+        self.bottom = np.zeros((self.CAPACITY, self.lanes), dtype=np.int64)
+        self.passed = np.zeros(self.CAPACITY, dtype=bool)
+        self.head = 0       # 最左侧（最早生成）的管道所在槽位
+        self.count = 0      # 当前屏幕上的管道数量
+        self.spawned = 0    # 累计生成的管道数量
+
+    def _next_height(self):
+        """
+        取出下一根管道在每条车道上的高度（与 Pipe.set_height 相同：randrange(50, 450)）
+        """
+        if self._cursor == self._block:
+            for lane, rng in enumerate(self._rngs):
+                self._heights[lane] = [rng.randrange(50, 450) for _ in range(self._block)]
+            self._cursor = 0
+        height = self._heights[:, self._cursor]
+        self._cursor += 1
+        return height
+
+    def slots(self):
+        """
+        按从左到右的顺序返回当前所有管道的槽位下标
+        """
+        return [(self.head + i) % self.CAPACITY for i in range(self.count)]
+
+    def spawn(self, x):
+        """
+        在 x 处生成一根新管道
+        """
+        if self.count == self.CAPACITY:
+            raise RuntimeError('管道数量超过了环形数组容量')
+        slot = (self.head + self.count) % self.CAPACITY
+        height = self._next_height()
+        self.x[slot] = x
+        self.height[slot] = height
+        self.top[slot] = height - self.PIPE_HEIGHT
+        self.bottom[slot] = height + self.GAP
+        self.passed[slot] = False
+        self.count += 1
+        self.spawned += 1
+        return slot
+
+    def move(self):
+        """
+        所有管道向左移动一帧（空槽位一起移动也不影响结果）
+        """
+        self.x -= self.VEL
+
+    def frames_until_event(self, bird_x, column):
+        """
+        管道匀速向左移动，x 坐标是帧数的线性函数，可以直接算出距离下一次"管道事件"还有多少帧：
+        某根管道进入小鸟所在的列（可能碰撞）、越过小鸟（计分并生成新管道）或移出屏幕
+        两次事件之间管道相关的检测都不会改变结果，可以跳过
+        :param bird_x: 小鸟的 x 坐标
+        :param column: CollisionModel.column 返回的开区间 (lo, hi)
+        :return: 至少为 1 的帧数；1 表示下一帧就需要处理
+        """
+        lo, hi = column
+        frames = None
+        for slot in self.slots():
+            x = int(self.x[slot])
+            # 进入碰撞列（已经在列中时为 1），穿过整列之后不再有碰撞事件
+            k = self._frames_until_below(x, hi)
+            candidates = [k] if x - self.VEL * k > lo else []
+            # 越过小鸟
+            if not self.passed[slot]:
+                candidates.append(self._frames_until_below(x, bird_x))
+            # 移出屏幕
+            candidates.append(self._frames_until_below(x + self.WIDTH, 0))
+            nearest = min(candidates)
+            frames = nearest if frames is None else min(frames, nearest)
+        return 1 if frames is None else frames
+
+    def _frames_until_below(self, x, bound):
+        """
+        从坐标 x 开始每帧左移 VEL，第一次小于 bound 需要的帧数（至少为 1）
+        """
+        if x - self.VEL < bound:
+            return 1
+        return (x - bound) // self.VEL + 1
+
+    def remove_offscreen(self):
+        """
+        回收已经完全移出屏幕左侧的管道槽位
+        """
+        while self.count and self.x[self.head] + self.WIDTH < 0:
+            self.head = (self.head + 1) % self.CAPACITY
+            self.count -= 1
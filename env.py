@@ -0,0 +1,196 @@
+import random
+
+import numpy as np
+
+from assets import collision_model
+from course import PipeCourse
+from flappy_bird import Bird
+from instrumentation import NULL_PROFILER
+from population import BirdPopulation
+
+# 小鸟的初始位置（与 main 中一致）
+BIRD_X = 230
+BIRD_Y = 350
+# 地面的 y 坐标（与 main 中 Base(730) 一致）
+FLOOR_Y = 730
+
+# 奖励：每存活一帧、撞上管道、飞过管道（与 main 中适应度的增减一致）
+ALIVE_REWARD = 0.1
+CRASH_REWARD = -1
+PASS_REWARD = 5
+
+
+class FlappyEnv:
+    """
+    批量的 Flappy Bird 环境：N 个环境同时推进，每个环境是一只小鸟在一条赛道上的一局游戏，
+    规则与 main 完全相同，和 NEAT 没有任何关系，可以由任意策略驱动
+
+        env = FlappyEnv(n)
+        obs = env.reset(seeds)
+        dones = env.dones
+        while not dones.all():
+            obs, rewards, dones = env.step(policy(obs))
+
+    - 观测是 main 喂给神经网络的三个输入：(小鸟 x, |y - 管道缺口上沿|, |y - 管道缺口下沿|)
+    - 奖励是适应度的增量：存活一帧 +0.1，撞上管道 -1，飞过管道 +5；
+      returns 按 main 中相同的顺序逐项累加，与 main 的适应度逐位相同（逐帧奖励之和可能有浮点舍入差异）
+    - 所有环境同步开始：结束的环境保持结束状态（观测不再更新、奖励为 0），直到下一次 reset
+    种子相同的环境共用同一条赛道车道（见 PipeCourse）；所有车道的管道 x 坐标相同，
+    碰撞、计分和回收只在解析算出的事件帧上处理（见 PipeCourse.frames_until_event）
+    """
+
+    def __init__(self, num_envs, profiler=None, publisher=None):
+        """
+        :param num_envs: 环境数量 N
+        :param profiler: instrumentation.FrameProfiler，记录物理和碰撞阶段的耗时；None 表示不记录
+        :param publisher: viewer.SnapshotPublisher，向观看进程推送第一条车道的快照；None 表示不推送
+        """
+        self.num_envs = num_envs
+        self.profiler = profiler or NULL_PROFILER
+        self.publisher = publisher
+        self.collision = collision_model()
+        self.img_height = Bird.IMGS[0].get_height()
+        self.birds = None
+        self.course = None
+        self.frame = 0
+
+    @property
+    def scores(self):
+        """
+        每个环境当前的分数
+        """
+        return self.lane_scores[self.lane_of]
+
+    @property
+    def dones(self):
+        """
+        每个环境是否已经结束
+        """
+        return ~self.birds.alive
+
+    def reset(self, seeds=None):
+        """
+        开始新的一局
+        :param seeds: 长度为 N 的赛道种子序列，种子相同的环境面对相同的管道；
+                      None（或序列中的 None）表示从全局 random 模块取种子，每个环境各不相同
+        :return: (N, 3) 的初始观测
+        """
+        if seeds is None:
+            seeds = [None] * self.num_envs
+        if len(seeds) != self.num_envs:
+            raise ValueError('需要 {} 个种子，实际为 {}'.format(self.num_envs, len(seeds)))
+        # 种子统一转成 Python int（可以直接传入 np.arange(N) 之类的 NumPy 数组）
+        seeds = [random.getrandbits(32) if s is None else int(s) for s in seeds]
+
+        # 按种子第一次出现的顺序分配车道
+        lanes = {}
+        self.lane_of = np.array([lanes.setdefault(s, len(lanes)) for s in seeds], dtype=np.int64)
+        self.course = PipeCourse(list(lanes))
+        self.course.spawn(600)
+        self.lane_scores = np.zeros(self.course.lanes, dtype=np.int64)
+        self.returns = np.zeros(self.num_envs, dtype=np.float64)
+        self.birds = BirdPopulation(self.num_envs, BIRD_X, BIRD_Y)
+        self.obs = np.zeros((self.num_envs, 3), dtype=np.float64)
+        self.obs[:, 0] = BIRD_X
+        self.frame = 0
+        # 小鸟所在的列，以及下一次需要处理管道（碰撞、计分、回收）的帧
+        self.column = self.collision.column(BIRD_X)
+        self.next_event = 0
+        # 观看进程只显示第一条车道
+        self._shown = np.flatnonzero(self.lane_of == 0)
+
+        self._advance()
+        return self.obs
+
+    def _advance(self):
+        """
+        一帧的前半段：存活小鸟下落，确定小鸟需要关注的管道，然后生成观测
+        （观测是下落之后的位置，与 main 中神经网络看到的一致）
+        """
+        course = self.course
+        birds = self.birds
+        birds.move()
+        alive = np.flatnonzero(birds.alive)
+        # 所有环境都已结束时不再生成新管道，屏幕上的管道最终会全部移出；观测保持不变
+        if len(alive) > 0 and course.count > 0:
+            slots = course.slots()
+            pipe_ind = 0
+            if len(slots) > 1 and BIRD_X > course.x[slots[0]] + course.WIDTH:
+                pipe_ind = 1
+            target = slots[pipe_ind]
+
+            y = birds.y[alive]
+            lane = self.lane_of[alive]
+            self.obs[alive, 1] = np.abs(y - course.height[target][lane])
+            self.obs[alive, 2] = np.abs(y - course.bottom[target][lane])
+        self.profiler.lap('physics')
+
+    def step(self, actions):
+        """
+        推进一帧
+        :param actions: 长度为 N 的布尔数组，True 表示跳跃；已经结束的环境忽略
+        :return: (观测 (N, 3), 奖励 (N,), 是否结束 (N,))；观测数组在各帧之间复用，需要保留时请复制
+                 所有环境都已结束时什么也不做，奖励全为 0
+        """
+        birds = self.birds
+        course = self.course
+        lane_of = self.lane_of
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        if not birds.alive.any():
+            return self.obs, rewards, ~birds.alive
+        # 本帧开始时存活的小鸟获得存活奖励
+        rewards[birds.alive] += ALIVE_REWARD
+        self.returns[birds.alive] += ALIVE_REWARD
+        birds.jump(np.asarray(actions, dtype=bool) & birds.alive)
+
+        # 管道移动、碰撞与计分
+        course.move()
+        self.profiler.lap('physics')
+        # 两次管道事件之间既不可能碰撞，也不会计分或回收管道，整段跳过
+        if self.frame >= self.next_event:
+            lo, hi = self.column
+            scored = np.zeros(course.lanes, dtype=bool)
+            for slot in course.slots():
+                alive = np.flatnonzero(birds.alive)
+                # 管道在小鸟所在的列上时，所有存活小鸟与这对管道一次批量碰撞检测
+                if lo < course.x[slot] < hi:
+                    lane = lane_of[alive]
+                    crashed = np.zeros(self.num_envs, dtype=bool)
+                    crashed[alive] = self.collision.collide_many(birds.frame[alive], BIRD_X, birds.y[alive],
+                                                                 course.x[slot], course.top[slot][lane],
+                                                                 course.bottom[slot][lane])
+                    rewards[crashed] += CRASH_REWARD
+                    self.returns[crashed] += CRASH_REWARD
+                    birds.kill(crashed)
+
+                # 只有还有存活小鸟的车道才计分；没有存活小鸟的车道之后的管道不再影响结果
+                if len(alive) > 0 and not course.passed[slot] and course.x[slot] < BIRD_X:
+                    course.passed[slot] = True
+                    scored[np.unique(lane_of[alive])] = True
+
+            if scored.any():
+                self.lane_scores += scored
+                rewards[birds.alive] += PASS_REWARD
+                self.returns[birds.alive] += PASS_REWARD
+                course.spawn(600)
+
+            course.remove_offscreen()
+            self.next_event = self.frame + course.frames_until_event(BIRD_X, self.column)
+        self.profiler.lap('collision')
+
+        # 地面/顶部碰撞检测（批量）
+        birds.kill(birds.out_of_bounds(FLOOR_Y, self.img_height))
+
+        # 小鸟动画（决定下一帧的碰撞掩模）
+        birds.animate()
+        self.frame += 1
+
+        # 有观看进程连接且到了发布间隔时，推送本帧快照（只是打包后交给后台线程，不会等待网络）
+        if self.publisher is not None and self.publisher.due():
+            visible = self._shown[birds.alive[self._shown]]
+            slots = course.slots()
+            self.publisher.publish(self.frame, int(self.lane_scores[0]), birds.y[visible], birds.tilt[visible],
+                                   birds.frame[visible], course.x[slots], course.height[slots, 0])
+
+        self._advance()
+        return self.obs, rewards, ~birds.alive
@@ -1,36 +1,58 @@
 import pygame
 import random
 import os
+import argparse
+import functools
 import neat
+import numpy as np
 
-# 初始化 Pygame 的字体模块
-pygame.font.init()
+import assets
+from assets import lazy_asset
+from batch_net import NETWORK_CACHE, BatchNetwork
+from instrumentation import NULL_PROFILER
 
 # 游戏窗口宽度（像素）
 WIN_WIDTH = 500
 # 游戏窗口高度（像素）
 WIN_HEIGHT = 800
 
-# 加载管道图片，并将其放大到原来的2倍（scale2x）
-# os.path.join 用于安全拼接路径，避免不同系统路径分隔符的问题
-PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'pipe.png')))
-# 加载地面图片，并放大2倍
-BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'base.png')))
-# 加载背景图片，并放大2倍
-BG_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'bg.png')))
-# 加载小鸟的3张动画帧图片，分别放大2倍，并存入列表，用于扇翅膀动画
-BIRD_IMGS = [
-    pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'bird1.png'))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'bird2.png'))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join('imgs', 'bird3.png')))
-]
-
-# 创建字体对象，用于显示游戏分数等文本
-# 使用 "Comic Sans MS" 字体，字号为50
-STAT_FONT = pygame.font.SysFont('comicsans', 50)
+# 图片、字体和碰撞几何都由 assets 在第一次使用时加载，导入本模块不会加载任何资源
+# 旧代码使用的模块级资源名（PIPE_IMG、STAT_FONT、COLLISION 等）仍然可以访问，访问时才加载
+_LAZY_GLOBALS = {
+    'PIPE_IMG': assets.pipe_image,
+    'PIPE_TOP_IMG': assets.pipe_top_image,
+    'BASE_IMG': assets.base_image,
+    'BG_IMG': assets.background_image,
+    'BIRD_IMGS': assets.bird_images,
+    'STAT_FONT': assets.stat_font,
+    'COLLISION': assets.collision_model,
+}
+
+
+def __getattr__(name):
+    loader = _LAZY_GLOBALS.get(name)
+    if loader is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    return loader()
+
+
+# 旋转后的小鸟图片缓存：倾斜角度只有少数几个离散值，每个 (动画帧, 角度) 只旋转一次
+_ROTATED = {}
+
+
+def rotated_sprite(img, tilt):
+    """
+    返回旋转 tilt 度后的图片，结果按 (图片, 角度) 缓存
+    """
+    key = (img, tilt)
+    rotated = _ROTATED.get(key)
+    if rotated is None:
+        rotated = _ROTATED[key] = pygame.transform.rotate(img, tilt)
+    return rotated
+
 
 class Bird:
-    IMGS = BIRD_IMGS        # 小鸟的动画帧列表
+    IMGS = lazy_asset(assets.bird_images)  # 小鸟的动画帧列表（第一次使用时加载）
     MAX_ROTATION = 25        # 小鸟最大倾斜角度（抬头/低头）
     ROT_VEL = 20             # 每帧旋转的速度
     ANIMATION_TIME = 5       # 每帧动画持续的游戏帧数
@@ -77,7 +99,12 @@ class Bird:
             if self.tilt > -90:
                 self.tilt -= self.ROT_VEL
 
-    def draw(self, screen):
+    def animate(self):
+        """
+        推进扇翅膀动画，并更新当前帧图片 self.img
+        碰撞掩模和落地判断都依赖 self.img，所以它属于模拟的一部分，
+        无论是否渲染都要每帧调用一次
+        """
         # 1. 动画帧切换逻辑：控制小鸟扇翅膀的节奏
         self.img_count += 1  # 每过一个游戏帧，动画计数器+1
 
@@ -106,22 +133,25 @@ class Bird:
             # 解释：设为ANIMATION_TIME*2（10），下次计数会从11开始，直接到第2帧，
             # 但因为tilt≤-80°会一直强制显示第1帧，所以动画暂停
 
-        # 3. 旋转小鸟图片并计算正确的绘制位置
-        # 旋转图片：根据当前倾斜角度tilt旋转图片
-        rotated_image = pygame.transform.rotate(self.img, self.tilt)
+    def draw(self, screen):
+        # 1. 旋转小鸟图片并计算正确的绘制位置
+        # 旋转图片：根据当前倾斜角度tilt旋转图片（同一帧、同一角度的旋转结果只计算一次）
+        rotated_image = rotated_sprite(self.img, self.tilt)
         # 计算旋转后的新矩形：保证旋转后图片以原中心为中心，避免位置偏移
         # 步骤：
         # - 先获取原图片的矩形（左上角在(self.x, self.y)）
         original_rect = self.img.get_rect(topleft=(self.x, self.y))
         # - 以原矩形的中心为旋转中心，创建新矩形
         new_rect = rotated_image.get_rect(center=original_rect.center)
-        # 4. 绘制旋转后的小鸟到屏幕
-        screen.blit(rotated_image, new_rect.topleft)
+        # 2. 绘制旋转后的小鸟到屏幕，返回实际绘制的区域
+        return screen.blit(rotated_image, new_rect.topleft)
+
     def get_mask(self):
-        # 从当前小鸟图片（self.img）生成一个掩模对象
+        # 返回当前小鸟图片（self.img）的掩模对象
         # 掩模会记录图片中每个像素是否为透明（alpha=0），
         # 用于判断小鸟与管道等物体是否发生像素级碰撞，而非简单的矩形碰撞
-        return pygame.mask.from_surface(self.img)
+        # 每个动画帧的掩模已预先生成，这里直接取用
+        return assets.collision_model().bird_masks[self.IMGS.index(self.img)]
 
 
 class Pipe:
@@ -132,11 +162,17 @@ class Pipe:
     GAP = 200
     # 管道向左移动的速度（固定值 5 像素/帧）
     VEL = 5
+    # 上管道图片（全局只翻转一次，所有管道共享；第一次使用时加载）
+    PIPE_TOP = lazy_asset(assets.pipe_top_image)
+    # 下管道图片：直接使用原始管道图片
+    PIPE_BOTTOM = lazy_asset(assets.pipe_image)
 
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
         """
         初始化管道对象
         :param x: 管道的初始 x 坐标（管道是从右向左移动的）
+        :param rng: 生成管道高度用的随机数生成器（默认使用全局 random 模块）；
+                    None 表示不生成高度，之后由 reset 设置
         """
         # 管道的 x 坐标（水平位置）
         self.x = x
@@ -148,29 +184,36 @@ class Pipe:
         # 下管道的 y 坐标（底部位置）
         self.bottom = 0
 
-        # 上管道图片：将原始管道图片垂直翻转，作为顶部管道
-        self.PIPE_TOP = pygame.transform.flip(PIPE_IMG, False, True)
-        # 下管道图片：直接使用原始管道图片
-        self.PIPE_BOTTOM = PIPE_IMG
-
         # 标记小鸟是否已经通过这对管道（用于计分）
         self.passed = False
 
         # 调用 set_height 方法，随机生成管道高度和位置
-        self.set_height()
+        if rng is not None:
+            self.set_height(rng)
 
-    def set_height(self):
+    def set_height(self, rng=random):
         """
         随机设置管道的高度，从而确定上下管道的位置
         从屏幕顶部开始计算高度
+        :param rng: 随机数生成器（需要提供 randrange 方法）
         """
         # 随机生成一个 50 到 450 之间的高度值，作为间隙的中心高度
-        self.height = random.randrange(50, 450)
+        self.height = rng.randrange(50, 450)
         # 计算上管道的 y 坐标：让上管道的底部刚好落在 self.height 位置
         self.top = self.height - self.PIPE_TOP.get_height()
         # 计算下管道的 y 坐标：让下管道的顶部刚好在 self.height + GAP 位置
         self.bottom = self.height + self.GAP
 
+    def reset(self, x, height):
+        """
+        把这个对象复用为位于 x、间隙中心高度为 height 的一对新管道
+        """
+        self.x = x
+        self.height = height
+        self.top = height - self.PIPE_TOP.get_height()
+        self.bottom = height + self.GAP
+        self.passed = False
+
     def move(self):
         # 管道向左移动：每帧减少x坐标，模拟小鸟向前飞的视觉效果
         self.x -= self.VEL
@@ -182,39 +225,18 @@ class Pipe:
         win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
 
     def collide(self, bird):
-        # 获取小鸟的碰撞掩模（用于精确碰撞检测）
-        bird_mask = bird.get_mask()
-        # 生成上管道的碰撞掩模
-        top_mask = pygame.mask.from_surface(self.PIPE_TOP)
-        # 生成下管道的碰撞掩模
-        bottom_mask = pygame.mask.from_surface(self.PIPE_BOTTOM)
-
-        # 计算上管道相对于小鸟的偏移量（用于掩模碰撞检测）
-        # offset = (管道x - 小鸟x, 管道y - 小鸟y)
-        top_offset = (self.x - bird.x, self.top - round(bird.y))
-        # 计算下管道相对于小鸟的偏移量
-        bottom_offset = (self.x - bird.x, self.bottom - round(bird.y))
-
-        # 检测小鸟掩模与上管道掩模是否重叠
-        # 如果重叠，返回重叠点坐标；否则返回 None
-        t_point = bird_mask.overlap(top_mask, top_offset)
-        # 检测小鸟掩模与下管道掩模是否重叠
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-
-        # 如果与上管道或下管道任意一个发生重叠，就判定为碰撞
-        if t_point or b_point:
-            return True
-
-        # 没有碰撞
-        return False
+        # 先用外接矩形快速排除，只有靠近管道边缘时才做像素级掩模检测
+        # 掩模由碰撞模型预先生成，不再每次调用都重新构建
+        frame = bird.IMGS.index(bird.img)
+        return assets.collision_model().collide(frame, bird.x, bird.y, self.x, self.top, self.bottom)
 
 class Base:
     # 地面向左移动的速度（与管道速度保持一致，营造小鸟向前飞的效果）
     VEL = 5
-    # 地面图片的宽度（从BASE_IMG中获取）
-    WIDTH = BASE_IMG.get_width()
-    # 地面图片素材（全局加载的BASE_IMG）
-    IMG = BASE_IMG
+    # 地面图片的宽度（从地面图片中获取）
+    WIDTH = lazy_asset(lambda: assets.base_image().get_width())
+    # 地面图片素材（第一次使用时加载）
+    IMG = lazy_asset(assets.base_image)
 
     def __init__(self, y):
         # 地面的y坐标（固定在屏幕底部）
@@ -258,19 +280,19 @@ def draw_window(win, birds, pipes, base, score):
     - base: 地面对象（实现滚动效果）
     - score: 当前游戏分数
     """
-    # 绘制背景图：将背景图片 BG_IMG 绘制到窗口的左上角 (0, 0)
-    win.blit(BG_IMG, (0, 0))
+    # 绘制背景图：将背景图片绘制到窗口的左上角 (0, 0)
+    win.blit(assets.background_image(), (0, 0))
 
     # 遍历所有管道对象，依次绘制到窗口上（Pipe类的draw方法负责绘制上下两根管道）
     for pipe in pipes:
         pipe.draw(win)
 
     # 渲染分数文本：
-    # STAT_FONT：预加载的字体对象（需提前初始化）
+    # assets.stat_font()：分数字体（第一次使用时初始化字体模块）
     # "Score: " + str(score)：要显示的文本内容
     # True：开启抗锯齿，让文字边缘更平滑
     # (255, 255, 255)：RGB颜色值，代表白色
-    text = STAT_FONT.render("Score: " + str(score), True, (255, 255, 255))
+    text = assets.stat_font().render("Score: " + str(score), True, (255, 255, 255))
 
     # 将分数文本绘制到窗口右上角：
     # x坐标：窗口宽度 - 10（右边距）- 文本宽度 → 实现文字右对齐
@@ -289,63 +311,182 @@ def draw_window(win, birds, pipes, base, score):
     pygame.display.update()
 
 
-def main(genomes, config):
+class Renderer:
+    """
+    可选的渲染观察者：负责游戏窗口、背景音乐、帧率控制和窗口事件
+    模拟循环只在需要观看训练时才挂载它；无头模式下完全不创建
+    与 draw_window 画出的画面相同，但每帧只重绘并提交变化的区域（脏矩形）：
+    - 先用背景覆盖上一帧画过的区域，再画出本帧的管道、分数、小鸟和地面
+    - 分数文字只在分数变化时重新渲染，小鸟的旋转图片按 (动画帧, 角度) 缓存
+    - 种群很大时可以只画一部分小鸟，让每帧绘制时间不随种群规模增长
+    """
+    # 观看时的帧率上限（与原游戏一致，30 FPS）
+    FPS = 30
+
+    def __init__(self, fps=FPS, music=True, max_birds=None, spread=False):
+        """
+        :param fps: 帧率上限，None 表示不限速
+        :param music: 是否播放背景音乐
+        :param max_birds: 每帧最多绘制的小鸟数量，None 表示全部绘制
+        :param spread: 为 False 时绘制列表中的前 max_birds 只（画面稳定，死掉一只就由下一只补上）；
+                       为 True 时在整个种群中等间隔抽取
+        """
+        self.fps = fps
+        self.max_birds = max_birds
+        self.spread = spread
+
+        if music:
+            # 背景音乐：每个进程只初始化混音器、加载一次 mp3，之后每代继续循环播放
+            assets.play_music(0.5)
+
+        # 创建游戏窗口（指定宽高）
+        self.win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
+        # 创建时钟对象：用于控制游戏帧率，保证不同设备运行速度一致
+        self.clock = pygame.time.Clock()
+
+        # 先画一次完整的背景，之后每帧只更新脏矩形
+        self.background = assets.background_image()
+        self.win.blit(self.background, (0, 0))
+        pygame.display.update()
+        self._dirty = []            # 上一帧画过的区域
+        self._score = None          # 已渲染的分数
+        self._score_text = None     # 已渲染的分数文字
+
+    def update(self, birds, pipes, base, score):
+        """
+        每帧模拟结束后调用：限速、处理窗口事件并绘制当前帧
+        """
+        self.handle_events()
+        self.draw(birds, pipes, base, score)
+
+    def handle_events(self):
+        """
+        限速并处理窗口事件（帧率等待的时间也计在这里）
+        """
+        # 限制游戏帧率：每秒最多执行 fps 次循环，避免游戏速度过快
+        if self.fps:
+            self.clock.tick(self.fps)
+
+        # 事件处理（用户输入/系统事件）
+        for event in pygame.event.get():
+            # 检测到"关闭窗口"事件：终止游戏
+            if event.type == pygame.QUIT:
+                pygame.quit()  # 关闭pygame模块
+                quit()
+
+    def visible(self, birds):
+        """
+        返回本帧需要绘制的小鸟
+        """
+        if self.max_birds is None or len(birds) <= self.max_birds:
+            return birds
+        if self.spread:
+            step = -(-len(birds) // self.max_birds)
+            return birds[::step]
+        return birds[:self.max_birds]
+
+    def draw(self, birds, pipes, base, score):
+        """
+        绘制当前帧，只把变化的区域提交到屏幕
+        """
+        win = self.win
+
+        # 用背景覆盖上一帧画过的区域（背景图片本身不动，所以只需要擦除）
+        for rect in self._dirty:
+            win.blit(self.background, rect, rect)
+
+        dirty = []
+        for pipe in pipes:
+            dirty.append(win.blit(pipe.PIPE_TOP, (pipe.x, pipe.top)))
+            dirty.append(win.blit(pipe.PIPE_BOTTOM, (pipe.x, pipe.bottom)))
+
+        # 分数变化时才重新渲染文字
+        if score != self._score:
+            self._score = score
+            self._score_text = assets.stat_font().render("Score: " + str(score), True, (255, 255, 255))
+        dirty.append(win.blit(self._score_text, (WIN_WIDTH - 10 - self._score_text.get_width(), 10)))
+
+        # 所有小鸟都在同一列附近，合并成一个外接矩形，避免成千上万个小矩形的擦除和提交开销
+        bird_rects = [bird.draw(win) for bird in self.visible(birds)]
+        if bird_rects:
+            dirty.append(bird_rects[0].unionall(bird_rects))
+
+        base.draw(win)
+        dirty.append(pygame.Rect(0, base.y, WIN_WIDTH, WIN_HEIGHT - base.y))
+
+        # 提交上一帧和本帧画过的区域：上一帧的区域已被擦除，本帧的区域是新画的内容
+        pygame.display.update(self._dirty + dirty)
+        self._dirty = dirty
+
+
+def main(genomes, config, headless=False, seed=None, profiler=None, limits=None, max_drawn_birds=None):
     """
     NEAT算法的核心运行函数（每一代种群的游戏循环）
     参数说明：
     - genomes: NEAT库传入的基因组列表（每一个基因组对应一只AI小鸟）
     - config: NEAT配置对象（加载自config_feedforward.txt）
+    - headless: True 时不创建窗口、不播放音乐、不限制帧率，模拟以 CPU 允许的最快速度运行
+    - seed: 管道随机种子，相同种子生成相同的管道序列；None 表示从全局 random 模块取一个种子
+    - profiler: instrumentation.FrameProfiler，记录每帧各阶段耗时和存活数量；None 表示不记录
+    - limits: termination.EvaluationLimits，帧数/时间/分数/适应度阈值等提前结束本局的条件；None 表示不限制
+    - max_drawn_birds: 观看时每帧最多绘制的小鸟数量，None 表示全部绘制
+    返回值：模拟的帧数
     """
+    profiler = profiler or NULL_PROFILER
+    # 本局使用的随机数生成器：所有管道高度都由它生成
+    from course import PipeCourse
 
-    # --- 1. 在游戏开始前初始化并播放背景音乐 ---
-    # 初始化 Pygame 的混音器模块
-    pygame.mixer.init()
-    # 加载背景音乐文件
-    pygame.mixer.music.load('Investigations.mp3')
-    # 设置音量（0.0 到 1.0 之间，这里设为50%）
-    pygame.mixer.music.set_volume(0.5)
-    # 播放音乐，-1 表示无限循环播放
-    pygame.mixer.music.play(-1)
-
+    # --- 1. 只有需要观看时才挂载渲染器（窗口 + 背景音乐 + 30 FPS 时钟） ---
+    renderer = None if headless else Renderer(max_birds=max_drawn_birds)
 
     # ========== 初始化种群相关变量 ==========
     birds = []  # 存储所有小鸟对象的列表
-    nets = []  # 存储所有神经网络对象的列表（每个小鸟对应一个神经网络）
+    rows = []  # 每只存活小鸟在本代批量神经网络中的编号
     ge = []  # 存储所有基因组对象的列表（记录每只小鸟的适应度）
 
     # 遍历NEAT传入的基因组（genomes是元组列表：(基因组ID, 基因组对象)）
     for _, g in genomes:
-        # 根据基因组和配置创建前馈神经网络（小鸟的"大脑"）
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)  # 将神经网络加入列表
+        rows.append(len(rows))
         birds.append(Bird(230, 350))  # 创建小鸟对象（初始位置x=230, y=350）
         g.fitness = 0  # 初始化基因组的适应度为0（适应度越高，越容易被保留）
         ge.append(g)  # 将基因组加入列表
 
+    # 根据基因组和配置组装本代的批量神经网络（小鸟的"大脑"）：
+    # 结构和参数都没有变化的基因组（如精英个体）直接复用缓存中的编译结果，不再重新编译
+    net = BatchNetwork.create(ge, config, NETWORK_CACHE)
+
     # ========== 游戏元素初始化 ==========
-    pipes = [Pipe(600)]  # 初始化管道列表：先创建1根管道，x坐标600（屏幕右侧外，准备进入画面）
+    # 管道保存在预分配的环形赛道中，管道高度都由种子生成；
+    # 每个槽位复用同一个 Pipe 对象做逐只碰撞检测和绘制，不再为每根新管道创建对象
+    course = PipeCourse(seed)
+    slot_pipes = [Pipe(0, None) for _ in range(course.CAPACITY)]
+
+    def spawn_pipe():
+        slot = course.spawn(600)  # x坐标600（屏幕右侧外，准备进入画面）
+        slot_pipes[slot].reset(600, int(course.height[slot, 0]))
+
+    spawn_pipe()  # 先生成1根管道
     base = Base(730)  # 创建地面对象：y坐标730（接近窗口底部，符合Flappy Bird地面位置）
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))  # 创建游戏窗口（指定宽高）
-    clock = pygame.time.Clock()  # 创建时钟对象：用于控制游戏帧率，保证不同设备运行速度一致
 
     score = 0  # 初始化游戏分数为0（飞过一根管道+1分）
+    frame = 0  # 已经模拟的帧数
     run = True  # 游戏主循环的运行标志（True=继续运行，False=退出循环）
+    if limits is not None:
+        limits.start()  # 开始计时（墙钟时间预算）
 
     # ========== 游戏主循环（每一代种群的生命周期） ==========
     while run:
-        # 限制游戏帧率为30 FPS：每秒最多执行30次循环，避免游戏速度过快
-        clock.tick(30)
-
-        # ========== 事件处理（用户输入/系统事件） ==========
-        for event in pygame.event.get():
-            # 检测到"关闭窗口"事件：终止游戏
-            if event.type == pygame.QUIT:
-                run = False  # 退出主循环
-                pygame.quit()  # 关闭pygame模块
-                quit()
+        # ========== 提前终止：存活的小鸟保留已获得的适应度 ==========
+        if limits is not None:
+            best = None
+            if limits.fitness_threshold is not None:
+                best = max(g.fitness for _, g in genomes)
+            if limits.reached(frame, score, best):
+                break
 
         # ========== 确定小鸟需要关注的管道（核心逻辑） ==========
         pipe_ind = 0  # 默认关注第0根管道（屏幕中最左侧的管道）
+        pipes = [slot_pipes[slot] for slot in course.slots()]  # 屏幕上的管道，从左到右
         if len(birds) > 0:  # 如果还有存活的小鸟
             # 如果存在多根管道，且小鸟飞过了第0根管道 → 切换关注第1根管道
             if len(pipes) > 1 and birds[0].x > pipes[0].x + pipes[0].PIPE_TOP.get_width():
@@ -353,82 +494,132 @@ def main(genomes, config):
         else:
             run = False  # 所有小鸟都死亡 → 终止本轮循环（进入下一代）
             break
+        profiler.begin_frame(len(birds))
 
-        # ========== 每只小鸟的AI决策与适应度更新 ==========
+        # ========== 每只小鸟的移动与适应度更新 ==========
         for x, bird in enumerate(birds):
             bird.move()  # 让小鸟自然下落（Bird类的move方法实现重力效果）
             ge[x].fitness += 0.1  # 每存活一帧，适应度+0.1（鼓励小鸟"活更久"）
-
-            # 神经网络输入（小鸟的3个感知特征）：
-            # 1. bird.x：小鸟的x坐标（水平位置）
-            # 2. abs(bird.y - pipes[pipe_ind].height)：小鸟与上管道底部的垂直距离
-            # 3. abs(bird.y - pipes[pipe_ind].bottom)：小鸟与下管道顶部的垂直距离
-            output = nets[x].activate((bird.x,
-                                       abs(bird.y - pipes[pipe_ind].height),
-                                       abs(bird.y - pipes[pipe_ind].bottom)))
-
-            # 神经网络输出：output[0]是0~1之间的数值（tanh激活函数输出归一化后）
-            # 如果输出>0.5 → 让小鸟跳跃（Bird类的jump方法实现向上飞）
+        profiler.lap('physics')
+
+        # ========== AI决策：所有存活小鸟的输入拼成一个矩阵，一次批量计算 ==========
+        # 神经网络输入（小鸟的3个感知特征）：
+        # 1. bird.x：小鸟的x坐标（水平位置）
+        # 2. abs(bird.y - pipes[pipe_ind].height)：小鸟与上管道底部的垂直距离
+        # 3. abs(bird.y - pipes[pipe_ind].bottom)：小鸟与下管道顶部的垂直距离
+        inputs = np.array([(bird.x,
+                            abs(bird.y - pipes[pipe_ind].height),
+                            abs(bird.y - pipes[pipe_ind].bottom)) for bird in birds], dtype=np.float64)
+        outputs = net.activate(inputs, rows)
+
+        # 神经网络输出：output[0]是0~1之间的数值（tanh激活函数输出归一化后）
+        # 如果输出>0.5 → 让小鸟跳跃（Bird类的jump方法实现向上飞）
+        for bird, output in zip(birds, outputs):
             if output[0] > 0.5:
                 bird.jump()
+        profiler.lap('network')
 
         # ========== 管道逻辑处理（移动/碰撞/新增/删除） ==========
-        rem = []  # 存储需要删除的管道（已移出屏幕的管道）
         add_pipe = False  # 标记是否需要新增管道（小鸟飞过当前管道后）
 
+        course.move()  # 所有管道一起向左移动（模拟小鸟向前飞的视觉效果）
         for pipe in pipes:
-            pipe.move()  # 让管道向左移动（模拟小鸟向前飞的视觉效果）
-
-            # 检测每只小鸟与管道的碰撞
-            for x, bird in enumerate(birds):
-                if pipe.collide(bird):  # Pipe类的collide方法检测碰撞
-                    ge[x].fitness -= 1  # 碰撞惩罚：适应度-1（鼓励小鸟避开管道）
-                    # 移除碰撞的小鸟、对应的神经网络和基因组
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
-
-                # 检测小鸟是否飞过管道（未标记passed，且管道x坐标 < 小鸟x坐标）
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True  # 标记该管道已被飞过
-                    add_pipe = True  # 标记需要新增一根管道
-
-            # 如果管道完全移出屏幕左侧 → 加入待删除列表（释放内存）
-            if pipe.x + pipe.PIPE_TOP.get_width() < 0:
-                rem.append(pipe)
+            pipe.move()
+            profiler.lap('physics')
+
+            # 检测每只小鸟与管道的碰撞（先收集再统一移除，避免边遍历边删除时漏检下一只小鸟）
+            # 管道不在小鸟所在的列上时不可能碰撞，直接跳过逐只检测
+            crashed = []
+            if birds and assets.collision_model().in_column(birds[0].x, pipe.x):
+                crashed = [x for x, bird in enumerate(birds) if pipe.collide(bird)]
+            profiler.lap('collision')
+
+            # 检测小鸟是否飞过管道（未标记passed，且管道x坐标 < 小鸟x坐标）
+            if birds and not pipe.passed and pipe.x < birds[0].x:
+                pipe.passed = True  # 标记该管道已被飞过
+                add_pipe = True  # 标记需要新增一根管道
+
+            # 从后往前移除碰撞的小鸟、对应的神经网络和基因组，保证下标不错位
+            for x in reversed(crashed):
+                ge[x].fitness -= 1  # 碰撞惩罚：适应度-1（鼓励小鸟避开管道）
+                birds.pop(x)
+                rows.pop(x)
+                ge.pop(x)
+
 
         # 小鸟飞过管道：分数+1，所有存活小鸟的适应度+5（奖励正确行为）
         if add_pipe:
             score += 1
             for g in ge:
                 g.fitness += 5  # 飞过管道奖励：适应度+5（比存活奖励更高，引导核心行为）
-            pipes.append(Pipe(600))  # 在屏幕右侧新增一根管道
+            spawn_pipe()  # 在屏幕右侧新增一根管道（复用一个空槽位）
 
-        # 移除所有已移出屏幕的管道
-        for r in rem:
-            pipes.remove(r)
+        # 回收所有已完全移出屏幕左侧的管道槽位
+        course.remove_offscreen()
 
         # ========== 地面/顶部碰撞检测 ==========
-        for x, bird in enumerate(birds):
-            # 小鸟撞到地面（y坐标+小鸟高度 > 地面y坐标）或飞出屏幕顶部（y < 0）
-            if bird.y + bird.img.get_height() > 730 or bird.y < 0:
-                # 移除撞地/出界的小鸟、对应的神经网络和基因组
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
-
-        # ========== 地面移动 ==========
-        base.move()  # 让地面向左滚动（Base类的move方法实现无限地面效果）
-
-        # ========== 绘制当前帧 ==========
-        draw_window(win, birds, pipes, base, score)  # 绘制所有元素并更新屏幕
-
-
-def run(config_file):
+        # 小鸟撞到地面（y坐标+小鸟高度 > 地面y坐标）或飞出屏幕顶部（y < 0）
+        fallen = [x for x, bird in enumerate(birds)
+                  if bird.y + bird.img.get_height() > 730 or bird.y < 0]
+        for x in reversed(fallen):
+            # 移除撞地/出界的小鸟、对应的神经网络和基因组
+            birds.pop(x)
+            rows.pop(x)
+            ge.pop(x)
+
+        # ========== 地面移动（只影响画面，无头模式下跳过） ==========
+        if renderer is not None:
+            base.move()  # 让地面向左滚动（Base类的move方法实现无限地面效果）
+
+        # ========== 小鸟动画（决定下一帧的碰撞掩模） ==========
+        for bird in birds:
+            bird.animate()
+        profiler.lap('physics')
+
+        # ========== 绘制当前帧（仅在挂载了渲染器时） ==========
+        if renderer is not None:
+            renderer.handle_events()  # 限速并处理窗口事件
+            profiler.lap('events')
+            pipes = [slot_pipes[slot] for slot in course.slots()]
+            renderer.draw(birds, pipes, base, score)  # 绘制所有元素并更新屏幕
+            profiler.lap('rendering')
+
+        frame += 1
+
+    return frame
+
+
+def run(config_file, headless=False, workers=1, seed=None, replay_path=None, profile_path=None,
+        trace_allocations=False, generations=50, checkpoint_dir=None, checkpoint_interval=5, resume=False,
+        export_path=None, max_frames=None, max_seconds=None, max_score=None, stop_at_threshold=False,
+        max_drawn_birds=None, publish_port=None, courses=1, aggregate='mean'):
     """
     运行 NEAT 进化算法，训练 Flappy Bird AI
     :param config_file: NEAT 配置文件路径
+    :param headless: True 时以无头模式训练（无窗口、无音乐、不限帧率）
+    :param workers: 并行评估的工作进程数，大于 1 时自动使用无头模式
+    :param seed: 随机种子；固定后进化过程和每代的管道序列都可以复现
+    :param replay_path: 训练结束后把最优基因组的一局录像保存到该路径
+    :param profile_path: 每代性能分析记录的输出路径（.csv 为 CSV，其余为 JSONL），None 表示不记录
+    :param trace_allocations: 性能分析时是否同时记录内存分配
+    :param generations: 最大进化代数
+    :param checkpoint_dir: 检查点目录，None 表示不保存检查点
+    :param checkpoint_interval: 每隔多少代保存一次检查点
+    :param resume: 是否从检查点目录中最新的检查点续跑
+    :param export_path: 训练结束后把最优基因组和预编译网络导出到该路径
+    :param max_frames: 每代最多模拟的帧数
+    :param max_seconds: 每代评估的墙钟时间预算（秒）
+    :param max_score: 每代分数达到该值时结束评估
+    :param stop_at_threshold: 任一基因组的适应度达到配置中的 fitness_threshold 时立即结束本代评估
+    :param max_drawn_birds: 观看训练时每帧最多绘制的小鸟数量，None 表示全部绘制
+    :param publish_port: 单进程无头训练时在该端口推送快照，可用 viewer.py 连接观看；None 表示不推送
+    :param courses: 每个基因组每代要玩的赛道数量，大于 1 时自动使用无头模式
+    :param aggregate: 多条赛道适应度的汇总方式：'mean'、'min'、'median' 或 0~1 之间的分位数
     """
+    # 固定全局随机种子：NEAT 的变异/繁殖和每代的赛道种子都从全局 random 取值
+    if seed is not None:
+        random.seed(seed)
+
     # 从配置文件创建 NEAT 配置对象
     # 依次传入：基因组类、繁殖类、物种集合类、停滞检测类、配置文件对象
     config = neat.config.Config(
@@ -440,28 +631,143 @@ def run(config_file):
     )
 
 
-    # 创建种群对象，代表当前一代的所有 AI 小鸟
-    p = neat.Population(config)
+    # 性能分析：评估函数在游戏循环中打点，报告器每代写一行记录
+    profiler = None
+    if profile_path is not None:
+        from instrumentation import FrameProfiler
+        profiler = FrameProfiler()
+
+    # 提前终止条件：学会游戏的基因组可能让一代评估永远不结束
+    limits = None
+    if stop_at_threshold or any(v is not None for v in (max_frames, max_seconds, max_score)):
+        from termination import EvaluationLimits
+        limits = EvaluationLimits(max_frames, max_seconds, max_score,
+                                  config.fitness_threshold if stop_at_threshold else None)
+
+    # 评估函数：多进程时把每代基因组分片到工作进程；
+    # 无头模式使用向量化的种群模拟器，否则使用带窗口的 main
+    # 多赛道评估把各条赛道作为同一次模拟中的车道，只有无头模拟器支持
+    evaluator = None
+    publisher = None
+    if workers > 1:
+        from parallel_eval import ParallelEvaluator
+        evaluator = ParallelEvaluator(workers, seed, profiler, limits, courses, aggregate)
+        eval_genomes = evaluator.evaluate
+    elif headless or courses > 1:
+        from simulation import eval_genomes
+        if publish_port is not None:
+            from viewer import SnapshotPublisher
+            publisher = SnapshotPublisher(port=publish_port)
+        eval_genomes = functools.partial(eval_genomes, profiler=profiler, limits=limits, publisher=publisher,
+                                         courses=courses, aggregate=aggregate)
+    else:
+        eval_genomes = functools.partial(main, profiler=profiler, limits=limits, max_drawn_birds=max_drawn_birds)
+
+    # 创建种群对象，代表当前一代的所有 AI 小鸟；
+    # 需要续跑时从检查点目录中最新的检查点恢复种群、物种、随机数状态和统计数据
+    stats = None
+    checkpoint = None
+    if resume and checkpoint_dir is not None:
+        from checkpointing import latest_checkpoint
+        checkpoint = latest_checkpoint(checkpoint_dir)
+    if checkpoint is not None:
+        from checkpointing import restore
+        p, stats = restore(checkpoint, config, evaluator)
+        print('Resuming from {} (generation {})'.format(checkpoint, p.generation))
+    else:
+        p = neat.Population(config)
 
     # 添加标准输出报告器：在控制台打印每一代的进化信息（如适应度、物种数量）
     p.add_reporter(neat.StdOutReporter(True))
     # 添加统计报告器：记录进化过程中的数据（如平均适应度、最优适应度）
-    stats = neat.StatisticsReporter()
+    if stats is None:
+        stats = neat.StatisticsReporter()
     p.add_reporter(stats)
 
+    if profiler is not None:
+        from instrumentation import ProfilingReporter
+        p.add_reporter(ProfilingReporter(profile_path, profiler, trace_allocations))
+
+    # 周期性地把进化状态原子地写入检查点目录，进程被中断后可以用 resume 续跑
+    if checkpoint_dir is not None:
+        from checkpointing import Checkpointer
+        p.add_reporter(Checkpointer(p, checkpoint_dir, checkpoint_interval, stats=stats, evaluator=evaluator))
+
     # 运行进化过程：
-    # - main：评估函数，用于评估每个基因组（AI小鸟）的适应度
-    # - 50：最大进化代数，进化到50代后停止
-    winner = p.run(main, 50)
+    # - eval_genomes：评估函数，用于评估每个基因组（AI小鸟）的适应度
+    # - generations：最大进化代数（续跑时扣除已经完成的代数）
+    try:
+        winner = p.run(eval_genomes, max(generations - p.generation, 0))
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+        if publisher is not None:
+            publisher.close()
 
     # 打印最终进化出的最优基因组（表现最好的AI小鸟的“大脑”结构）
     print('\nBest genome:\n{!s}'.format(winner))
 
+    # 保存最优基因组的录像：之后无需重新进化即可无头重放、复现它的分数和适应度
+    if replay_path is not None:
+        from replay import record
+        record(winner, config, config_file=config_file).save(replay_path)
+
+    # 导出最优基因组和预编译网络：之后用 checkpointing.load_winner 直接加载，无需重新进化
+    if export_path is not None:
+        from checkpointing import export_winner
+        export_winner(winner, config, export_path)
+
+
+def _aggregate_arg(value):
+    """
+    解析 --aggregate：汇总方式的名称或分位数
+    """
+    if value in ('mean', 'min', 'median'):
+        return value
+    try:
+        q = float(value)
+    except ValueError:
+        q = None
+    if q is None or not 0 <= q <= 1:
+        raise argparse.ArgumentTypeError('应为 mean、min、median 或 0~1 之间的分位数：{!r}'.format(value))
+    return q
+
 
 if __name__ == '__main__':
+    # 命令行参数：--headless 表示不打开窗口，以最快速度训练
+    parser = argparse.ArgumentParser(description='NEAT Flappy Bird')
+    parser.add_argument('--headless', action='store_true', help='无头模式：无窗口、无音乐、不限帧率')
+    parser.add_argument('--workers', type=int, default=1, help='并行评估的工作进程数')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子，固定后训练过程可复现')
+    parser.add_argument('--replay', default=None, help='训练结束后保存最优基因组录像的路径')
+    parser.add_argument('--profile', default=None, help='每代性能分析记录的输出路径（.csv 或 .jsonl）')
+    parser.add_argument('--trace-allocations', action='store_true', help='性能分析时同时记录内存分配')
+    parser.add_argument('--generations', type=int, default=50, help='最大进化代数')
+    parser.add_argument('--checkpoint-dir', default=None, help='检查点目录')
+    parser.add_argument('--checkpoint-interval', type=int, default=5, help='每隔多少代保存一次检查点')
+    parser.add_argument('--resume', action='store_true', help='从检查点目录中最新的检查点续跑')
+    parser.add_argument('--export', default=None, help='训练结束后导出最优基因组和预编译网络的路径')
+    parser.add_argument('--max-frames', type=int, default=None, help='每代最多模拟的帧数')
+    parser.add_argument('--max-seconds', type=float, default=None, help='每代评估的墙钟时间预算（秒）')
+    parser.add_argument('--max-score', type=int, default=None, help='每代分数达到该值时结束评估')
+    parser.add_argument('--stop-at-threshold', action='store_true',
+                        help='任一基因组达到配置中的 fitness_threshold 时立即结束本代评估')
+    parser.add_argument('--draw-birds', type=int, default=None, help='观看训练时每帧最多绘制的小鸟数量')
+    parser.add_argument('--publish', type=int, default=None, metavar='PORT',
+                        help='单进程无头训练时在该端口推送快照，用 viewer.py 观看')
+    parser.add_argument('--courses', type=int, default=1, help='每个基因组每代要玩的赛道数量')
+    parser.add_argument('--aggregate', type=_aggregate_arg, default='mean',
+                        help="多条赛道适应度的汇总方式：mean、min、median 或 0~1 之间的分位数")
+    args = parser.parse_args()
+
     # 获取当前脚本所在目录，用于拼接配置文件路径
     local_dir = os.path.dirname(__file__)
     # 拼接配置文件路径：当前目录下的 config_feedforward.txt
     config_path = os.path.join(local_dir, 'config_feedforward.txt')
     # 调用 run 函数，开始训练 AI
-    run(config_path)
\ No newline at end of file
+    run(config_path, headless=args.headless, workers=args.workers, seed=args.seed, replay_path=args.replay,
+        profile_path=args.profile, trace_allocations=args.trace_allocations, generations=args.generations,
+        checkpoint_dir=args.checkpoint_dir, checkpoint_interval=args.checkpoint_interval, resume=args.resume,
+        export_path=args.export, max_frames=args.max_frames, max_seconds=args.max_seconds,
+        max_score=args.max_score, stop_at_threshold=args.stop_at_threshold, max_drawn_birds=args.draw_birds,
+        publish_port=args.publish, courses=args.courses, aggregate=args.aggregate)
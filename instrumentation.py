@@ -0,0 +1,146 @@
+import csv
+import json
+import time
+import tracemalloc
+
+from neat.reporting import BaseReporter
+
+
+class FrameProfiler:
+    """
+    游戏循环中的计时钩子：把每帧的耗时按阶段累计，并按间隔记录存活小鸟数量
+    用法：每帧开头调用 begin_frame，每个阶段结束时调用 lap(阶段名)，
+    距离上一次打点的时间记到该阶段上
+    """
+    PHASES = ('physics', 'network', 'collision', 'rendering', 'events')
+
+    def __init__(self, sample_every=1):
+        """
+        :param sample_every: 每隔多少帧记录一次存活数量
+        """
+        self.sample_every = sample_every
+        self.reset()
+
+    def reset(self):
+        """
+        清空统计，开始新一代
+        """
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.frames = 0
+        self.alive = []
+        self._mark = time.perf_counter()
+
+    def begin_frame(self, alive):
+        """
+        :param alive: 本帧开始时存活的小鸟数量
+        """
+        if self.frames % self.sample_every == 0:
+            self.alive.append(int(alive))
+        self.frames += 1
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        把距离上一次打点的时间记到 phase 阶段
+        """
+        now = time.perf_counter()
+        self.times[phase] += now - self._mark
+        self._mark = now
+
+    def stats(self):
+        """
+        返回本代统计数据（可序列化）
+        """
+        return {'frames': self.frames, 'times': dict(self.times), 'alive': list(self.alive)}
+
+    def merge(self, stats):
+        """
+        合并另一个分析器（例如工作进程中的）的统计：
+        各阶段耗时相加，帧数取最大，同一帧的存活数量相加
+        """
+        for phase, seconds in stats['times'].items():
+            self.times[phase] += seconds
+        self.frames = max(self.frames, stats['frames'])
+        alive = stats['alive']
+        if len(alive) > len(self.alive):
+            self.alive.extend([0] * (len(alive) - len(self.alive)))
+        for i, count in enumerate(alive):
+            self.alive[i] += count
+
+
+class NullProfiler(FrameProfiler):
+    """
+    不做任何记录的分析器，未开启性能分析时使用，避免游戏循环里到处判断 None
+    """
+
+    def begin_frame(self, alive):
+        pass
+
+    def lap(self, phase):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class ProfilingReporter(BaseReporter):
+    """
+    每代结束评估后，把本代的墙钟时间、模拟帧数、各阶段耗时、存活数量变化和内存分配
+    写入一行记录；文件扩展名为 .csv 时写 CSV，否则写 JSONL
+    """
+    CSV_FIELDS = ('generation', 'wall_time', 'frames', 'physics', 'network', 'collision', 'rendering',
+                  'events', 'other', 'population', 'best_fitness', 'alloc_current', 'alloc_peak', 'alive')
+
+    def __init__(self, path, profiler, trace_allocations=False):
+        """
+        :param path: 输出文件路径
+        :param profiler: 传给评估函数的 FrameProfiler
+        :param trace_allocations: 是否用 tracemalloc 记录每代的内存分配（会拖慢模拟）
+        """
+        self.path = path
+        self.profiler = profiler
+        self.trace_allocations = trace_allocations
+        self.csv = path.endswith('.csv')
+        self.generation = None
+        self.start = None
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # 新建输出文件；CSV 先写表头
+        with open(self.path, 'w', newline='') as f:
+            if self.csv:
+                csv.writer(f).writerow(self.CSV_FIELDS)
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.profiler.reset()
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        wall_time = time.perf_counter() - self.start
+        stats = self.profiler.stats()
+        times = stats['times']
+        record = {
+            'generation': self.generation,
+            'wall_time': wall_time,
+            'frames': stats['frames'],
+        }
+        record.update(times)
+        # 没有被任何阶段覆盖的时间：网络编译、评估函数的准备工作等
+        record['other'] = max(0.0, wall_time - sum(times.values()))
+        record['population'] = len(population)
+        record['best_fitness'] = best_genome.fitness
+        if self.trace_allocations:
+            record['alloc_current'], record['alloc_peak'] = tracemalloc.get_traced_memory()
+        else:
+            record['alloc_current'] = record['alloc_peak'] = None
+        record['alive'] = stats['alive']
+
+        with open(self.path, 'a', newline='') as f:
+            if self.csv:
+                row = dict(record, alive=';'.join(map(str, record['alive'])))
+                csv.writer(f).writerow([row[field] for field in self.CSV_FIELDS])
+            else:
+                f.write(json.dumps(record) + '\n')
@@ -0,0 +1,106 @@
+import multiprocessing
+import random
+
+import simulation
+from instrumentation import FrameProfiler
+from termination import EvaluationLimits
+
+
+def _evaluate_shard(genomes, config, seed, profile=False, limits=None, courses=1, aggregate='mean'):
+    """
+    工作进程中执行：用共享的管道种子评估一片基因组，按输入顺序返回适应度
+    多条赛道的种子都由共享种子派生，所有分片面对相同的几条赛道
+    profile 为 True 时同时返回本片的性能统计，否则统计为 None
+    同时返回模拟的帧数，以及是否因为提前终止条件而结束
+    """
+    profiler = FrameProfiler() if profile else None
+    frames = simulation.eval_genomes(genomes, config, seed=seed, profiler=profiler, limits=limits,
+                                     courses=courses, aggregate=aggregate)
+    stopped = limits is not None and limits.stopped is not None
+    return [g.fitness for _, g in genomes], profiler.stats() if profile else None, frames, stopped
+
+
+class ParallelEvaluator:
+    """
+    多进程评估器：把一代的基因组分片到常驻的工作进程中并行评估
+    - 同一代的所有分片使用同一个管道种子，保证每只小鸟面对完全相同的赛道
+    - 工作进程在多代之间复用，只在创建时付出一次 pygame 导入和图片加载的开销
+    - 适应度按分片顺序写回，结果与单进程评估相同
+    - 设置了提前终止条件时，各分片可能在不同的帧结束；越过最早终止帧的分片会按该帧数重新评估，
+      保证所有基因组的适应度都按相同的帧数计算
+    """
+
+    def __init__(self, num_workers, seed=None, profiler=None, limits=None, courses=1, aggregate='mean'):
+        """
+        :param num_workers: 工作进程数
+        :param seed: 生成每代管道种子的随机种子，None 表示不固定
+        :param profiler: instrumentation.FrameProfiler，各工作进程的统计会合并到它上面；None 表示不记录
+        :param limits: termination.EvaluationLimits，None 表示直到所有小鸟死亡
+        :param courses: 每个基因组每代要玩的赛道数量
+        :param aggregate: 多条赛道适应度的汇总方式（见 simulation.aggregate_fitness）
+        """
+        self.num_workers = num_workers
+        self.profiler = profiler
+        self.limits = limits
+        self.courses = courses
+        self.aggregate = aggregate
+        self.rng = random.Random(seed)
+        self.pool = multiprocessing.Pool(num_workers)
+
+    def evaluate(self, genomes, config):
+        """
+        评估函数，可直接传给 Population.run
+        :param genomes: NEAT库传入的基因组列表
+        :param config: NEAT配置对象
+        """
+        # 本代所有分片共享的管道种子
+        seed = self.rng.getrandbits(32)
+
+        # 按顺序切成 num_workers 片，每片大小相差不超过 1
+        size, extra = divmod(len(genomes), self.num_workers)
+        shards = []
+        start = 0
+        for i in range(self.num_workers):
+            end = start + size + (1 if i < extra else 0)
+            if end > start:
+                shards.append(genomes[start:end])
+            start = end
+
+        profile = self.profiler is not None
+        results = self._run_shards(shards, config, seed, profile, self.limits)
+
+        # 最早因终止条件结束的帧；跑得更久的分片截断到这一帧重新评估
+        stops = [frames for _, _, frames, stopped in results if stopped]
+        if stops:
+            stop = min(stops)
+            rerun = [i for i, (_, _, frames, _) in enumerate(results) if frames > stop]
+            # 重新评估不计入性能统计，避免同一帧的存活数量被重复累加
+            redone = self._run_shards([shards[i] for i in rerun], config, seed, False,
+                                      EvaluationLimits(max_frames=stop))
+            for i, result in zip(rerun, redone):
+                results[i] = result
+
+        for shard, (fitnesses, _, _, _) in zip(shards, results):
+            for (_, g), fitness in zip(shard, fitnesses):
+                g.fitness = fitness
+
+    def _run_shards(self, shards, config, seed, profile, limits):
+        """
+        在工作进程中并行评估各分片，按分片顺序返回结果
+        """
+        jobs = [self.pool.apply_async(_evaluate_shard, (shard, config, seed, profile, limits,
+                                                        self.courses, self.aggregate))
+                for shard in shards]
+        results = [job.get() for job in jobs]
+        if profile:
+            # 各阶段耗时为所有工作进程的 CPU 时间之和，存活数量为所有分片之和
+            for _, stats, _, _ in results:
+                self.profiler.merge(stats)
+        return results
+
+    def close(self):
+        """
+        关闭并回收所有工作进程
+        """
+        self.pool.close()
+        self.pool.join()
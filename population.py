@@ -0,0 +1,104 @@
+import numpy as np
+
+from flappy_bird import Bird
+
+
+class BirdPopulation:
+    """
+    结构化数组（SoA）形式的小鸟种群
+    每个属性是一条 NumPy 数组，第 i 个元素对应第 i 只小鸟，
+    一帧内所有小鸟的运动学只需要几次数组运算，结果与逐只调用 Bird.move 完全一致
+    """
+    MAX_ROTATION = Bird.MAX_ROTATION    # 小鸟最大倾斜角度（抬头）
+    ROT_VEL = Bird.ROT_VEL              # 每帧旋转的速度
+    ANIMATION_TIME = Bird.ANIMATION_TIME  # 每帧动画持续的游戏帧数
+    JUMP_VEL = -10.5                    # 跳跃初速度（与 Bird.jump 一致）
+    MAX_DISPLACEMENT = 16               # 单帧最大下落距离
+    # 动画计数器 img_count（自增之后）→ 动画帧下标，与 Bird.animate 的分支一一对应
+    # img_count == 20 时原逻辑不改变图片，此时上一帧必定是第1帧，所以同样填 1
+    FRAME_TABLE = np.array([0] * ANIMATION_TIME + [1] * ANIMATION_TIME
+                           + [2] * ANIMATION_TIME + [1] * ANIMATION_TIME + [1, 0])
+
+    def __init__(self, size, x, y):
+        """
+        :param size: 小鸟数量
+        :param x: 所有小鸟共同的 x 坐标（小鸟只在竖直方向运动）
+        :param y: 所有小鸟的初始 y 坐标
+        """
+        self.size = size
+        self.x = x
+        self.y = np.full(size, y, dtype=np.float64)
+        self.vel = np.zeros(size, dtype=np.float64)
+        self.tick_count = np.zeros(size, dtype=np.int64)
+        self.height = self.y.copy()
+        self.tilt = np.zeros(size, dtype=np.int64)
+        self.img_count = np.zeros(size, dtype=np.int64)
+        # 当前动画帧下标（0/1/2），对应 Bird.IMGS，决定碰撞掩模
+        self.frame = np.zeros(size, dtype=np.int64)
+        # 存活标记：死亡的小鸟不再参与运动、决策和碰撞
+        self.alive = np.ones(size, dtype=bool)
+
+    def jump(self, mask):
+        """
+        让 mask 为 True 的小鸟跳跃（等价于对这些小鸟调用 Bird.jump）
+        """
+        self.vel[mask] = self.JUMP_VEL
+        self.tick_count[mask] = 0
+        self.height[mask] = self.y[mask]
+
+    def move(self):
+        """
+        推进所有存活小鸟一帧（等价于对每只存活小鸟调用 Bird.move）
+        """
+        alive = self.alive
+        self.tick_count[alive] += 1
+        t = self.tick_count[alive]
+
+        # 计算位移：s = v₀t + 0.5*at²，并限制最大下落距离
+        displacement = self.vel[alive] * t + 0.5 * 3 * t ** 2
+        displacement = np.minimum(displacement, self.MAX_DISPLACEMENT)
+        # 微调向上跳跃的距离
+        displacement[displacement < 0] -= 2
+
+        y = self.y[alive] + displacement
+        self.y[alive] = y
+
+        # 根据运动状态计算倾斜角度：上升或刚起跳时抬头，否则逐帧低头（最低 -90°）
+        tilt = self.tilt[alive]
+        rising = (displacement < 0) | (y < self.height[alive] + 50)
+        tilt = np.where(rising,
+                        np.maximum(tilt, self.MAX_ROTATION),
+                        np.where(tilt > -90, tilt - self.ROT_VEL, tilt))
+        self.tilt[alive] = tilt
+
+    def animate(self):
+        """
+        推进所有存活小鸟的扇翅膀动画（等价于 Bird.animate）
+        """
+        alive = self.alive
+        img_count = self.img_count[alive] + 1
+        frame = self.FRAME_TABLE[np.minimum(img_count, len(self.FRAME_TABLE) - 1)]
+        # 第21帧之后计数器归零，重新开始循环
+        img_count[img_count == self.ANIMATION_TIME * 4 + 1] = 0
+
+        # 垂直下落（倾斜≤-80°）时停止扇翅膀，固定显示翅膀水平帧
+        diving = self.tilt[alive] <= -80
+        frame[diving] = 1
+        img_count[diving] = self.ANIMATION_TIME * 2
+
+        self.img_count[alive] = img_count
+        self.frame[alive] = frame
+
+    def out_of_bounds(self, floor_y, img_height):
+        """
+        返回撞到地面或飞出屏幕顶部的存活小鸟的布尔掩码
+        :param floor_y: 地面的 y 坐标
+        :param img_height: 小鸟图片高度
+        """
+        return self.alive & ((self.y + img_height > floor_y) | (self.y < 0))
+
+    def kill(self, mask):
+        """
+        将 mask 为 True 的小鸟标记为死亡
+        """
+        self.alive &= ~mask
@@ -0,0 +1,134 @@
+import argparse
+import hashlib
+import random
+import struct
+
+import numpy as np
+
+from batch_net import BatchNetwork
+from simulation import simulate
+
+# 录像文件头：魔数、格式版本、赛道种子、配置哈希、帧数、分数、适应度（小端序）
+MAGIC = b'FBRP'
+VERSION = 1
+_HEADER = struct.Struct('<4sBQ32sIId')
+
+# 录制时默认最多模拟的帧数（30 FPS 下约 10 分钟），防止完美的基因组无限运行
+MAX_FRAMES = 30 * 60 * 10
+
+
+def config_hash(config_file):
+    """
+    计算 NEAT 配置文件的 SHA-256 摘要，用来确认录像和配置是否匹配
+    :param config_file: 配置文件路径，None 时返回全零摘要
+    """
+    if config_file is None:
+        return bytes(32)
+    with open(config_file, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+class Replay:
+    """
+    一只小鸟的一局录像：赛道种子 + 每帧是否跳跃的决策
+    重放时不需要神经网络，按录制的决策无头重新模拟即可得到相同的分数和适应度
+    """
+
+    def __init__(self, seed, config_digest, decisions, score, fitness):
+        """
+        :param seed: 赛道随机种子（0 ~ 2**64-1）
+        :param config_digest: 录制时 NEAT 配置文件的 SHA-256 摘要
+        :param decisions: 每帧是否跳跃的布尔数组
+        :param score: 录制时的分数
+        :param fitness: 录制时的适应度
+        """
+        self.seed = seed
+        self.config_digest = config_digest
+        self.decisions = np.asarray(decisions, dtype=bool)
+        self.score = score
+        self.fitness = fitness
+
+    def save(self, path):
+        """
+        写入紧凑的二进制录像文件：文件头之后是按位打包的决策序列
+        """
+        header = _HEADER.pack(MAGIC, VERSION, self.seed, self.config_digest,
+                              len(self.decisions), self.score, self.fitness)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(np.packbits(self.decisions).tobytes())
+
+    @staticmethod
+    def load(path):
+        """
+        读取录像文件
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, digest, frames, score, fitness = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('不是 Flappy Bird 录像文件: {}'.format(path))
+        if version != VERSION:
+            raise ValueError('不支持的录像格式版本: {}'.format(version))
+        bits = np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size)
+        decisions = np.unpackbits(bits, count=frames).astype(bool)
+        return Replay(seed, digest, decisions, score, fitness)
+
+    def simulate(self):
+        """
+        按录制的决策无头重新模拟
+        :return: (分数, 适应度)
+        """
+        decisions = self.decisions
+
+        def decide(frame, inputs, rows):
+            return decisions[frame:frame + 1]
+
+        fitness, score, _ = simulate(decide, 1, self.seed, max_frames=len(decisions))
+        return score, float(fitness[0])
+
+    def verify(self, config_file=None):
+        """
+        重放并检查结果是否与录制时一致
+        :param config_file: 若提供，同时检查配置文件摘要是否一致
+        """
+        if config_file is not None and config_hash(config_file) != self.config_digest:
+            return False
+        return self.simulate() == (self.score, self.fitness)
+
+
+def record(genome, config, seed=None, config_file=None, max_frames=MAX_FRAMES):
+    """
+    让一个基因组单独玩一局并录制它的每帧决策
+    小鸟之间互不影响，所以单独录制的结果与它在种群中同一赛道上的表现相同
+    :param genome: 要录制的基因组
+    :param config: NEAT配置对象
+    :param seed: 赛道随机种子，None 表示从全局 random 模块取一个
+    :param config_file: NEAT 配置文件路径，用于写入配置摘要
+    :param max_frames: 最多录制的帧数
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    net = BatchNetwork.create([genome], config)
+    decisions = []
+
+    def decide(frame, inputs, rows):
+        jump = net.activate(inputs, rows)[:, 0] > 0.5
+        decisions.append(bool(jump[0]))
+        return jump
+
+    fitness, score, _ = simulate(decide, 1, seed, max_frames=max_frames)
+    return Replay(seed, config_hash(config_file), decisions, score, float(fitness[0]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='无头重放 Flappy Bird 录像并校验结果')
+    parser.add_argument('replay', help='录像文件路径')
+    parser.add_argument('--config', default=None, help='NEAT 配置文件，用于校验配置摘要')
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    score, fitness = replay.simulate()
+    print('seed={} frames={} score={} fitness={}'.format(replay.seed, len(replay.decisions), score, fitness))
+    print('recorded score={} fitness={}'.format(replay.score, replay.fitness))
+    print('OK' if replay.verify(args.config) else 'MISMATCH')
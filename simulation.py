@@ -0,0 +1,139 @@
+import random
+
+import numpy as np
+
+from batch_net import NETWORK_CACHE, BatchNetwork
+from env import FlappyEnv
+from instrumentation import NULL_PROFILER
+
+
+def simulate(decide, size, seed=None, max_frames=None, profiler=None, limits=None, publisher=None):
+    """
+    无头模拟一局游戏，规则与 main 完全相同（只有一条赛道的 simulate_courses）
+    :param decide: 决策函数 decide(frame, inputs, rows)，rows 是存活小鸟的下标，
+                   inputs 是对应的 (len(rows), 3) 输入矩阵，返回每只小鸟是否跳跃的布尔数组
+    :param size: 小鸟数量
+    :param seed: 赛道随机种子；相同种子生成相同的管道序列，None 表示从全局 random 模块取种子
+    :param max_frames: 最多模拟的帧数，None 表示直到所有小鸟死亡
+    :param profiler: instrumentation.FrameProfiler，记录各阶段耗时和存活数量；None 表示不记录
+    :param limits: termination.EvaluationLimits，提前结束本局的条件；None 表示不限制
+    :param publisher: viewer.SnapshotPublisher，向观看进程推送快照；None 表示不推送
+    :return: (每只小鸟的适应度数组, 分数, 模拟的帧数)
+    """
+    fitness, scores, frames = simulate_courses(decide, size, [seed], max_frames=max_frames, profiler=profiler,
+                                               limits=limits, publisher=publisher)
+    return fitness[0], int(scores[0]), frames
+
+
+def simulate_courses(decide, size, seeds, aggregate='mean', max_frames=None, profiler=None, limits=None,
+                     publisher=None):
+    """
+    无头模拟：size 个个体同时在 len(seeds) 条赛道上各玩一局，规则与 main 完全相同
+    每条赛道是一条"车道"，车道 k 上的第 i 只小鸟由第 i 个个体控制；所有车道在同一个循环中批量推进，
+    决策也是一次批量计算，而不是依次模拟每条赛道。同一帧所有存活小鸟的适应度相同，
+    所以每条车道的结果与单独用该种子模拟一局完全一致
+    游戏本身由 env.FlappyEnv 推进，这里只是它的一个使用者：每帧把存活小鸟的观测交给 decide，
+    适应度就是环境的累计奖励 returns
+    :param decide: 决策函数 decide(frame, inputs, rows)，rows 是存活小鸟对应的个体下标（可能重复），
+                   inputs 是对应的 (len(rows), 3) 输入矩阵，返回每只小鸟是否跳跃的布尔数组
+    :param size: 个体数量
+    :param seeds: 每条赛道的随机种子，None 表示从全局 random 模块取种子
+    :param aggregate: 汇总各赛道适应度的方式（见 aggregate_fitness），只用于 fitness_threshold 终止条件
+    :param max_frames: 最多模拟的帧数，None 表示直到所有小鸟死亡
+    :param profiler: instrumentation.FrameProfiler，记录各阶段耗时和存活数量；None 表示不记录
+    :param limits: termination.EvaluationLimits，提前结束本局的条件；None 表示不限制
+    :param publisher: viewer.SnapshotPublisher，向观看进程推送第一条赛道的快照；None 表示不推送
+    :return: (形状为 (赛道数, size) 的适应度数组, 每条赛道的分数数组, 模拟的帧数)
+    """
+    profiler = profiler or NULL_PROFILER
+    # 个体 i 在第 k 条赛道上的一局是第 k * size + i 个环境；种子先取定，同一条赛道的环境共用一条车道
+    seeds = [random.getrandbits(32) if s is None else s for s in seeds]
+    env = FlappyEnv(size * len(seeds), profiler, publisher)
+    obs = env.reset([s for s in seeds for _ in range(size)])
+    fitness = env.returns
+    dones = env.dones
+    if limits is not None:
+        limits.start()
+
+    while not dones.all() and (max_frames is None or env.frame < max_frames):
+        # 提前终止：存活小鸟保留已获得的适应度
+        if limits is not None:
+            best = None
+            if limits.fitness_threshold is not None:
+                best = aggregate_fitness(fitness.reshape(len(seeds), size), aggregate).max()
+            if limits.reached(env.frame, env.lane_scores.max(), best):
+                break
+
+        alive = np.flatnonzero(~dones)
+        profiler.begin_frame(len(alive))
+
+        # 决策：所有赛道的存活小鸟的观测拼成一个矩阵，一次批量计算
+        jump = np.zeros(env.num_envs, dtype=bool)
+        jump[alive] = decide(env.frame, obs[alive], alive % size)
+        profiler.lap('network')
+
+        obs, _, dones = env.step(jump)
+
+    # 各赛道按种子第一次出现的顺序分配车道，第 k 条赛道的分数就是第 k 组环境所在车道的分数
+    scores = env.lane_scores[env.lane_of[::size]]
+    return fitness.reshape(len(seeds), size), scores, env.frame
+
+
+def aggregate_fitness(fitness, how='mean'):
+    """
+    把每个个体在多条赛道上的适应度汇总成一个值
+    :param fitness: 形状为 (赛道数, 个体数) 的适应度数组
+    :param how: 'mean'（平均）、'min'（最差一条赛道）、'median'（中位数），或 0~1 之间的分位数
+    :return: 每个个体汇总后的适应度数组
+    """
+    if how == 'mean':
+        return fitness.mean(axis=0)
+    if how == 'min':
+        return fitness.min(axis=0)
+    if how == 'median':
+        return np.median(fitness, axis=0)
+    if isinstance(how, (int, float)) and 0 <= how <= 1:
+        return np.quantile(fitness, how, axis=0)
+    raise ValueError('不支持的适应度汇总方式：{!r}'.format(how))
+
+
+def course_seeds(seed, courses):
+    """
+    为一代评估生成 courses 条赛道的种子
+    只有一条赛道时直接使用 seed（与单赛道评估完全相同）；否则由 seed 派生，
+    同一个 seed 总是派生出相同的种子，多进程评估的各分片因此面对相同的赛道
+    :param seed: 赛道随机种子，None 表示从全局 random 模块取种子
+    :param courses: 赛道数量
+    """
+    if courses == 1:
+        return [seed]
+    rng = random if seed is None else random.Random(seed)
+    return [rng.getrandbits(32) for _ in range(courses)]
+
+
+def eval_genomes(genomes, config, seed=None, profiler=None, limits=None, publisher=None, courses=1,
+                 aggregate='mean'):
+    """
+    向量化的无头评估函数，可直接传给 Population.run
+    :param genomes: NEAT库传入的基因组列表
+    :param config: NEAT配置对象
+    :param seed: 赛道随机种子，None 表示从全局 random 模块取种子
+    :param profiler: instrumentation.FrameProfiler，None 表示不记录
+    :param limits: termination.EvaluationLimits，None 表示直到所有小鸟死亡
+    :param publisher: viewer.SnapshotPublisher，None 表示不推送快照
+    :param courses: 每个基因组要玩的赛道数量；大于 1 时所有基因组在同一次模拟中玩相同的几条赛道
+    :param aggregate: 多条赛道适应度的汇总方式（见 aggregate_fitness）
+    :return: 模拟的帧数
+    """
+    ge = [g for _, g in genomes]
+    # 每代组装一次批量网络（没有变化的基因组直接复用缓存中的编译结果），之后每帧一次调用完成所有存活小鸟的决策
+    net = BatchNetwork.create(ge, config, NETWORK_CACHE)
+
+    def decide(frame, inputs, rows):
+        return net.activate(inputs, rows)[:, 0] > 0.5
+
+    fitness, _, frames = simulate_courses(decide, len(ge), course_seeds(seed, courses), aggregate,
+                                          profiler=profiler, limits=limits, publisher=publisher)
+    for g, f in zip(ge, aggregate_fitness(fitness, aggregate)):
+        g.fitness = float(f)
+    return frames
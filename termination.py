@@ -0,0 +1,47 @@
+import time
+
+
+class EvaluationLimits:
+    """
+    每代评估的提前终止条件，任一条件满足时整局立即结束
+    结束时所有存活小鸟都保留已经获得的适应度，不奖励也不惩罚，
+    所以同一局中每个基因组的适应度都按相同的帧数计算
+    """
+
+    def __init__(self, max_frames=None, max_seconds=None, max_score=None, fitness_threshold=None):
+        """
+        :param max_frames: 每代最多模拟的帧数
+        :param max_seconds: 每代评估的墙钟时间预算（秒）；结果取决于机器速度，只作为兜底
+        :param max_score: 分数达到该值时结束
+        :param fitness_threshold: 任一基因组的适应度达到该值时结束（通常取配置中的 fitness_threshold）
+        """
+        self.max_frames = max_frames
+        self.max_seconds = max_seconds
+        self.max_score = max_score
+        self.fitness_threshold = fitness_threshold
+        self.deadline = None
+        self.stopped = None
+
+    def start(self):
+        """
+        每局开始时调用：开始计时，并清除上一局的终止原因
+        """
+        self.deadline = None if self.max_seconds is None else time.perf_counter() + self.max_seconds
+        self.stopped = None
+
+    def reached(self, frame, score, best_fitness=None):
+        """
+        每帧开始前调用，判断是否应当结束本局；结束时把原因记在 stopped 上
+        :param frame: 已经模拟完的帧数
+        :param score: 当前分数
+        :param best_fitness: 当前最高的适应度，只有设置了 fitness_threshold 时才需要
+        """
+        if self.max_frames is not None and frame >= self.max_frames:
+            self.stopped = 'frames'
+        elif self.max_score is not None and score >= self.max_score:
+            self.stopped = 'score'
+        elif self.fitness_threshold is not None and best_fitness >= self.fitness_threshold:
+            self.stopped = 'fitness'
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = 'time'
+        return self.stopped is not None
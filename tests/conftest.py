@@ -0,0 +1,38 @@
+import os
+import random
+import sys
+
+# 测试不打开窗口、不输出声音
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# 游戏模块在仓库根目录，图片和配置文件按相对路径加载
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import neat
+import pytest
+
+
+@pytest.fixture(scope='module')
+def config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                              neat.DefaultStagnation, 'config_feedforward.txt')
+
+
+@pytest.fixture(scope='module')
+def genomes(config):
+    """
+    随机权重的一代基因组：有的马上坠地，有的能飞过几根管道，碰撞和计分的各个分支都会走到
+    """
+    state = random.getstate()
+    random.seed(4)
+    population = neat.Population(config).population
+    for g in population.values():
+        for cg in g.connections.values():
+            cg.weight = random.uniform(-3, 3)
+        for ng in g.nodes.values():
+            ng.bias = random.uniform(-3, 3)
+    random.setstate(state)
+    return list(population.items())[:40]
@@ -0,0 +1,27 @@
+import random
+
+import numpy as np
+import pygame
+
+import assets
+import flappy_bird
+
+
+def test_collide_many_matches_pixel_masks():
+    model = assets.collision_model()
+    pipe_img = assets.pipe_image()
+    masks = (pygame.mask.from_surface(assets.pipe_top_image()), pygame.mask.from_surface(pipe_img))
+    rng = random.Random(0)
+    for frame, img in enumerate(assets.bird_images()):
+        bird_mask = pygame.mask.from_surface(img)
+        for pipe_x in range(330, 120, -15):
+            height = rng.randrange(50, 450)
+            top = height - pipe_img.get_height()
+            bottom = height + flappy_bird.Pipe.GAP
+            ys = np.arange(height - 60, height + 260, 1.5)
+            hit = model.collide_many(np.full(len(ys), frame), 230, ys, pipe_x, top, bottom)
+            for y, h in zip(ys, hit):
+                y = int(round(y))
+                expected = (bird_mask.overlap(masks[0], (pipe_x - 230, top - y)) is not None
+                            or bird_mask.overlap(masks[1], (pipe_x - 230, bottom - y)) is not None)
+                assert h == expected
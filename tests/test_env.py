@@ -0,0 +1,32 @@
+import numpy as np
+
+from env import FlappyEnv
+
+
+def test_step_after_all_done_is_noop():
+    # 所有小鸟都不跳，很快全部落地；之后继续推进到管道全部移出屏幕之后也不应出错
+    env = FlappyEnv(4)
+    env.reset([1, 2, 3, 1])
+    actions = np.zeros(4, dtype=bool)
+    for _ in range(500):
+        obs, rewards, dones = env.step(actions)
+    assert dones.all()
+    assert obs.shape == (4, 3)
+
+    frame = env.frame
+    returns = env.returns.copy()
+    obs_before = obs.copy()
+    obs, rewards, dones = env.step(actions)
+    assert env.frame == frame
+    assert not rewards.any()
+    assert np.array_equal(env.returns, returns)
+    assert np.array_equal(obs, obs_before)
+
+
+def test_reset_accepts_numpy_seeds():
+    # NumPy 整数种子与对应的 Python int 种子生成相同的赛道
+    env = FlappyEnv(3)
+    obs = env.reset(np.arange(3)).copy()
+    other = FlappyEnv(3)
+    assert np.array_equal(other.reset([0, 1, 2]), obs)
+    assert np.array_equal(env.course.height, other.course.height)
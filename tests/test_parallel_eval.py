@@ -0,0 +1,26 @@
+import copy
+import random
+
+import simulation
+from parallel_eval import ParallelEvaluator
+from termination import EvaluationLimits
+
+MAX_FRAMES = 800
+
+
+def _fitness(genomes):
+    return [g.fitness for _, g in genomes]
+
+
+def test_parallel_matches_single_process(genomes, config):
+    a = copy.deepcopy(genomes)
+    b = copy.deepcopy(genomes)
+    evaluator = ParallelEvaluator(2, seed=9, limits=EvaluationLimits(max_frames=MAX_FRAMES))
+    try:
+        evaluator.evaluate(a, config)
+    finally:
+        evaluator.close()
+    # 评估器每代的管道种子取自 random.Random(seed)
+    seed = random.Random(9).getrandbits(32)
+    simulation.eval_genomes(b, config, seed=seed, limits=EvaluationLimits(max_frames=MAX_FRAMES))
+    assert _fitness(a) == _fitness(b)
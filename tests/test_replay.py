@@ -0,0 +1,33 @@
+import copy
+
+import numpy as np
+
+import simulation
+from replay import Replay, record
+
+CONFIG_FILE = 'config_feedforward.txt'
+SEED = 99
+
+
+def test_replay_round_trip(genomes, config, tmp_path):
+    evaluated = copy.deepcopy(genomes)
+    simulation.eval_genomes(evaluated, config, seed=SEED)
+    path = str(tmp_path / 'best.rpl')
+    for _, genome in evaluated[:10]:
+        replay = record(genome, config, seed=SEED, config_file=CONFIG_FILE)
+        # 单独录制的一局与种群中同一赛道上的表现相同
+        assert replay.fitness == genome.fitness
+        replay.save(path)
+        loaded = Replay.load(path)
+        assert loaded.seed == SEED
+        assert (loaded.score, loaded.fitness) == (replay.score, replay.fitness)
+        assert np.array_equal(loaded.decisions, replay.decisions)
+        assert loaded.verify(CONFIG_FILE)
+
+
+def test_replay_rejects_other_config(genomes, config, tmp_path):
+    other = tmp_path / 'config.txt'
+    other.write_text(open(CONFIG_FILE).read() + '\n')
+    replay = record(genomes[0][1], config, seed=SEED, config_file=CONFIG_FILE)
+    assert replay.verify()
+    assert not replay.verify(str(other))
@@ -0,0 +1,27 @@
+import copy
+
+import pytest
+
+import flappy_bird
+import simulation
+from termination import EvaluationLimits
+
+SEEDS = [0, 1, 2]
+MAX_FRAMES = 800
+
+
+def _fitness(genomes):
+    return [g.fitness for _, g in genomes]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_main_matches_eval_genomes(genomes, config, seed):
+    a = copy.deepcopy(genomes)
+    b = copy.deepcopy(genomes)
+    frames_main = flappy_bird.main(a, config, headless=True, seed=seed,
+                                   limits=EvaluationLimits(max_frames=MAX_FRAMES))
+    frames_sim = simulation.eval_genomes(b, config, seed=seed, limits=EvaluationLimits(max_frames=MAX_FRAMES))
+    assert frames_main == frames_sim
+    assert _fitness(a) == _fitness(b)
+    # 至少有一只小鸟飞过了管道
+    assert max(_fitness(a)) > 5
@@ -0,0 +1,260 @@
+import argparse
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+# 快照格式：长度前缀 + 文件头（魔数、版本、帧号、分数、存活数量、快照中的小鸟数、管道数）
+# + 小鸟数组 + 管道数组（小端序）
+MAGIC = b'FBSN'
+VERSION = 1
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<4sBIIIIB')
+BIRD_DTYPE = np.dtype([('y', '<f4'), ('tilt', 'i1'), ('frame', 'u1')])
+PIPE_DTYPE = np.dtype([('x', '<i2'), ('height', '<i2')])
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class Snapshot:
+    """
+    一帧游戏状态的快照
+    """
+
+    def __init__(self, frame, score, alive, birds, pipes):
+        """
+        :param frame: 本局已经模拟的帧数
+        :param score: 当前分数
+        :param alive: 存活小鸟的总数（快照中可能只包含其中一部分）
+        :param birds: BIRD_DTYPE 结构化数组
+        :param pipes: PIPE_DTYPE 结构化数组
+        """
+        self.frame = frame
+        self.score = score
+        self.alive = alive
+        self.birds = birds
+        self.pipes = pipes
+
+    def encode(self):
+        return (_HEADER.pack(MAGIC, VERSION, self.frame, self.score, self.alive, len(self.birds), len(self.pipes))
+                + self.birds.tobytes() + self.pipes.tobytes())
+
+    @staticmethod
+    def decode(data):
+        magic, version, frame, score, alive, num_birds, num_pipes = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('不是受支持的快照格式')
+        offset = _HEADER.size
+        birds = np.frombuffer(data, dtype=BIRD_DTYPE, count=num_birds, offset=offset)
+        offset += birds.nbytes
+        pipes = np.frombuffer(data, dtype=PIPE_DTYPE, count=num_pipes, offset=offset)
+        return Snapshot(frame, score, alive, birds, pipes)
+
+
+class SnapshotPublisher:
+    """
+    在后台线程中运行 asyncio TCP 服务器，向连接上来的观看进程推送游戏快照
+    - 训练循环调用 publish 只是打包并替换"最新快照"，然后唤醒事件循环，从不等待网络
+    - 每个观看进程只会收到它来得及接收的最新快照，跟不上时中间的帧直接丢弃
+    - 没有观看进程连接时 due() 直接返回 False，训练循环连快照都不用打包
+    观看进程可以随时连接和断开
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_fps=30, max_birds=200):
+        """
+        :param host: 监听地址
+        :param port: 监听端口，0 表示由系统分配（实际端口见 self.port）
+        :param max_fps: 每秒最多打包的快照数
+        :param max_birds: 每个快照最多包含的小鸟数量
+        """
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / max_fps
+        self.max_birds = max_birds
+        self.clients = 0
+        self._next = 0.0
+        self._latest = None
+        self._events = set()
+        self._error = None
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshot-publisher', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            server = self._loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+        self._loop.run_forever()
+
+        # close() 之后：关闭服务器，取消所有连接的协程
+        server.close()
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.run_until_complete(server.wait_closed())
+        self._loop.close()
+
+    async def _serve(self, reader, writer):
+        event = asyncio.Event()
+        self._events.add(event)
+        self.clients = len(self._events)
+        try:
+            while True:
+                await event.wait()
+                event.clear()
+                # 观看进程已经断开：停止推送
+                if reader.at_eof() or writer.is_closing():
+                    break
+                data = self._latest
+                writer.write(_LENGTH.pack(len(data)) + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # 观看进程断开，或发布者正在关闭
+            pass
+        finally:
+            self._events.discard(event)
+            self.clients = len(self._events)
+            writer.close()
+
+    def _notify(self):
+        for event in self._events:
+            event.set()
+
+    def due(self):
+        """
+        是否需要发布下一帧：有观看进程连接，且距离上次发布已经超过帧间隔
+        """
+        if not self.clients:
+            return False
+        now = time.perf_counter()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return True
+
+    def publish(self, frame, score, ys, tilts, frames, pipe_x, pipe_height):
+        """
+        发布一帧快照（只在训练线程中调用，不会阻塞）
+        :param ys / tilts / frames: 存活小鸟的 y 坐标、倾斜角度、动画帧
+        :param pipe_x / pipe_height: 屏幕上各管道的 x 坐标和高度
+        """
+        count = min(len(ys), self.max_birds)
+        birds = np.empty(count, dtype=BIRD_DTYPE)
+        birds['y'] = ys[:count]
+        birds['tilt'] = tilts[:count]
+        birds['frame'] = frames[:count]
+        pipes = np.empty(len(pipe_x), dtype=PIPE_DTYPE)
+        pipes['x'] = pipe_x
+        pipes['height'] = pipe_height
+        self._latest = Snapshot(frame, score, len(ys), birds, pipes).encode()
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def close(self):
+        """
+        停止服务器并等待后台线程退出
+        """
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class SnapshotReceiver:
+    """
+    观看进程中的接收线程：连接发布者并不断读取快照，只保留最新的一帧
+    连接断开或训练进程尚未启动时每隔一秒重试
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.latest = None
+        self.connected = False
+        self._thread = threading.Thread(target=self._run, name='snapshot-receiver', daemon=True)
+        self._thread.start()
+
+    def _read(self, f, size):
+        data = f.read(size)
+        if len(data) < size:
+            raise ConnectionError('发布者已断开')
+        return data
+
+    def _run(self):
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port)) as sock, sock.makefile('rb') as f:
+                    self.connected = True
+                    while True:
+                        size, = _LENGTH.unpack(self._read(f, _LENGTH.size))
+                        self.latest = Snapshot.decode(self._read(f, size))
+            except OSError:
+                pass
+            self.connected = False
+            time.sleep(1)
+
+
+def view(host=DEFAULT_HOST, port=DEFAULT_PORT, fps=30):
+    """
+    观看进程的主循环：用游戏原有的 Bird / Pipe / Base 绘制最新收到的快照
+    """
+    from flappy_bird import Base, Bird, Pipe, Renderer
+
+    receiver = SnapshotReceiver(host, port)
+    renderer = Renderer(fps=fps, music=False)
+    base = Base(730)
+    base_frame = 0
+    shown = None
+    while True:
+        renderer.handle_events()
+        snapshot = receiver.latest
+        if snapshot is None or snapshot is shown:
+            continue
+        shown = snapshot
+
+        # 地面只依赖帧号：新一局开始时重置，之后补上跳过的帧
+        if snapshot.frame < base_frame:
+            base = Base(730)
+            base_frame = 0
+        for _ in range(snapshot.frame - base_frame):
+            base.move()
+        base_frame = snapshot.frame
+
+        birds = []
+        for y, tilt, frame in snapshot.birds.tolist():
+            bird = Bird(230, y)
+            bird.tilt = tilt
+            bird.img = bird.IMGS[frame]
+            birds.append(bird)
+        pipes = []
+        for x, height in snapshot.pipes.tolist():
+            pipe = Pipe(x)
+            pipe.height = height
+            pipe.top = height - pipe.PIPE_TOP.get_height()
+            pipe.bottom = height + pipe.GAP
+            pipes.append(pipe)
+        renderer.draw(birds, pipes, base, snapshot.score)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='观看正在无头训练的 Flappy Bird')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='训练进程的地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='训练进程的端口')
+    parser.add_argument('--fps', type=int, default=30, help='绘制帧率')
+    args = parser.parse_args()
+    view(args.host, args.port, args.fps)